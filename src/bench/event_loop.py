@@ -0,0 +1,128 @@
+"""
+Same bot workload under the default asyncio loop and uvloop.
+
+    python -m src.bench.event_loop --bots 50 --ticks 200 --latency 0.005
+
+The fake exchange runs in its own process. Every loop mode runs in a fresh process:
+each tick, all bots read their ticker and send the buy and sell limit orders of their grid
+concurrently, like PingPongBot.execute does. The loop watchdog records the worst scheduling lag.
+"""
+import argparse
+import asyncio
+import math
+import multiprocessing
+import queue
+import socket
+import statistics
+import time
+
+from src.binance.rest import BinanceClient
+from src.loop import ASYNCIO, UVLOOP, LoopWatchdog, install_event_loop
+from src.mock.fake_binance import FakeBinance
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(port, symbols, latency, ready):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    balances = {symbol[:-len("USDT")]: 1e12 for symbol in symbols}
+    balances["USDT"] = 1e12
+    exchange = FakeBinance(prices={symbol: 40.0 for symbol in symbols}, balances=balances, latency=latency, port=port)
+    loop.run_until_complete(exchange.start())
+    ready.set()
+    loop.run_forever()
+
+
+async def bot_tick(client, symbol, levels):
+    ticker = await client.get_ticker(symbol)
+    price = ticker.last
+    await asyncio.gather(
+        *[client.buy_order_limit(symbol, price - 0.01 * (i + 1), 0.001) for i in range(levels)],
+        *[client.sell_order_limit(symbol, price + 0.01 * (i + 1), 0.001) for i in range(levels)]
+    )
+
+
+def run_workload(mode, host, symbols, ticks, levels, results):
+    installed = install_event_loop(mode)
+    loop = asyncio.get_event_loop()
+    watchdog = LoopWatchdog(loop, threshold=0.05, on_stall=lambda stall: None)
+    watchdog.start()
+    client = BinanceClient("key", "secret", host=host)
+
+    durations = []
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick_started = time.perf_counter()
+        loop.run_until_complete(asyncio.gather(*[bot_tick(client, symbol, levels) for symbol in symbols]))
+        durations.append(time.perf_counter() - tick_started)
+    total = time.perf_counter() - started
+    watchdog.stop()
+    results.put((installed, total, durations, watchdog.max_lag))
+
+
+def wait_result(worker, results, timeout):
+    """
+    :return: result of the worker, None when it died or did not finish within timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not worker.is_alive():
+                return None
+    worker.terminate()
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--levels", type=int, default=2, help="buy and sell orders per bot per tick")
+    parser.add_argument("--latency", type=float, default=0.005, help="delay of the fake exchange, seconds")
+    parser.add_argument("--timeout", type=float, default=600, help="max run time of one loop mode, seconds")
+    args = parser.parse_args()
+
+    symbols = ["COIN{}USDT".format(i) for i in range(args.bots)]
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, symbols, args.latency, ready), daemon=True)
+    server.start()
+    ready.wait()
+
+    requests = args.bots * (1 + 2 * args.levels)
+    print(f"bots: {args.bots}, ticks: {args.ticks}, requests per tick: {requests}, "
+          f"exchange latency: {args.latency * 1000:.0f} ms")
+    for mode in (ASYNCIO, UVLOOP):
+        results = multiprocessing.Queue()
+        worker = multiprocessing.Process(
+            target=run_workload,
+            args=(mode, "http://127.0.0.1:{}".format(port), symbols, args.ticks, args.levels, results)
+        )
+        worker.start()
+        result = wait_result(worker, results, args.timeout)
+        worker.join()
+        if result is None:
+            print(f"{mode:<8} failed, worker exit code {worker.exitcode}")
+            continue
+        installed, total, durations, max_lag = result
+        if installed != mode:
+            print(f"{mode:<8} not available, ran on {installed}")
+            continue
+        durations.sort()
+        print(f"{mode:<8} {args.ticks * requests / total:9.0f} req/s   "
+              f"tick p50 {statistics.median(durations) * 1000:7.2f} ms   "
+              f"p99 {durations[math.ceil(len(durations) * 0.99) - 1] * 1000:7.2f} ms   "
+              f"max loop lag {max_lag * 1000:6.2f} ms")
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
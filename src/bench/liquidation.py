@@ -0,0 +1,97 @@
+"""
+Breach-to-flat latency of the stop loss against a local fake exchange.
+
+    python -m src.bench.liquidation --runs 20 --latency 0.02 --orders 10
+
+Each run rests `orders` grid sell orders that lock the whole balance, then pushes a price
+below the stop to the guard, like the market data hub or the websocket does, and measures
+the time until the market sell is filled.
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import time
+
+from src.binance.rest import BinanceClient
+from src.client import Ticker
+from src.liquidation import EmergencyLiquidator, StopLossGuard
+from src.mock.fake_binance import FakeBinance
+
+SYMBOL = "NEOUSDT"
+ASSET = "NEO"
+STOP_PRICE = 35.0
+TOTAL_AMOUNT = 1.0
+
+
+async def prepare(latency, orders):
+    exchange = FakeBinance(prices={SYMBOL: 40.0}, balances={ASSET: TOTAL_AMOUNT, "USDT": 0.0}, latency=latency)
+    await exchange.start()
+    client = BinanceClient("key", "secret", host=exchange.host)
+    amount = TOTAL_AMOUNT / orders
+    await asyncio.gather(*[client.sell_order_limit(SYMBOL, 41.0 + i, amount) for i in range(orders)])
+    return exchange, client
+
+
+async def run_guard(latency, orders):
+    exchange, client = await prepare(latency, orders)
+    guard = StopLossGuard(EmergencyLiquidator(client, SYMBOL, ASSET), STOP_PRICE)
+    watcher = asyncio.ensure_future(guard.watch())
+    await asyncio.sleep(0)
+
+    exchange.prices[SYMBOL] = STOP_PRICE - 1
+    breached_at = time.perf_counter()
+    guard.on_ticker(SYMBOL, Ticker(bid=STOP_PRICE - 1, ask=STOP_PRICE - 1, last=STOP_PRICE - 1))
+    await watcher
+    await exchange.stop()
+
+    if not exchange.fills or exchange.free[ASSET] > 1e-9:
+        return None, guard.liquidator.latency
+    return exchange.fills[-1]["time"] - breached_at, guard.liquidator.latency
+
+
+async def run_legacy(latency, orders):
+    """ Previous check_stop_loss: one limit sell of TOTAL_AMOUNT while grid orders are still resting """
+    exchange, client = await prepare(latency, orders)
+    exchange.prices[SYMBOL] = STOP_PRICE - 1
+    result = await client.sell_order_limit(SYMBOL, STOP_PRICE / 2, TOTAL_AMOUNT)
+    await exchange.stop()
+    return result is not None
+
+
+def describe(name, values):
+    values = sorted(values)
+    print(f"{name:<22} p50 {statistics.median(values) * 1000:8.2f} ms   "
+          f"p95 {values[math.ceil(len(values) * 0.95) - 1] * 1000:8.2f} ms   max {values[-1] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="one way delay of the fake exchange, seconds")
+    parser.add_argument("--orders", type=int, default=10, help="resting grid orders locking the balance")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    breach_to_flat, execution, failed = [], [], 0
+    for _ in range(args.runs):
+        total, liquidation = loop.run_until_complete(run_guard(args.latency, args.orders))
+        if total is None:
+            failed += 1
+            continue
+        breach_to_flat.append(total)
+        execution.append(liquidation)
+
+    legacy_ok = loop.run_until_complete(run_legacy(args.latency, args.orders))
+
+    print(f"runs: {args.runs}, exchange latency: {args.latency * 1000:.0f} ms, "
+          f"resting orders: {args.orders}")
+    if breach_to_flat:
+        describe("breach -> flat", breach_to_flat)
+        describe("liquidation requests", execution)
+    print(f"failed liquidations: {failed}")
+    print(f"legacy limit sell with resting orders: {'filled' if legacy_ok else 'rejected (balance locked)'}")
+
+
+if __name__ == '__main__':
+    main()
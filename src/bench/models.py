@@ -0,0 +1,132 @@
+"""
+Typed models and per-endpoint decoders against the previous generic parsing.
+
+    python -m src.bench.models --balances 500 --orders 1000
+
+Legacy: json.loads(..., parse_float=float) into full dicts, string fields in plain classes
+and float(ticker.last) on every tick. Typed: src.binance.decoders into the NamedTuple models.
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+
+from src.binance.decoders import decode_open_orders, decode_ticker, wallet_decoder
+
+
+class LegacyTicker:
+    def __init__(self, bid: str, ask: str, last: str):
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+
+
+class LegacyWallet:
+    def __init__(self, available: str):
+        self.available = available
+
+
+class LegacyOpenOrder:
+    def __init__(self, price, order_id, amount, side):
+        self.price = price
+        self.order_id = order_id
+        self.amount = amount
+        self.side = side
+
+
+def legacy_ticker(text):
+    ticker = json.loads(text, parse_float=float)
+    return LegacyTicker(last=ticker["price"], ask="", bid="")
+
+
+def legacy_tick(text):
+    return float(legacy_ticker(text).last)
+
+
+def typed_tick(text):
+    return decode_ticker(text).last
+
+
+def legacy_wallet(text, asset):
+    wallet = json.loads(text, parse_float=float)
+    balance = 0.0
+    for wallet in wallet["balances"]:
+        if wallet["asset"] == asset:
+            balance = wallet["free"]
+    return float(LegacyWallet(available=str(balance)).available)
+
+
+def legacy_open_orders(text):
+    return [
+        LegacyOpenOrder(price=order["price"], amount=order["origQty"], side=order["side"], order_id=order["orderId"])
+        for order in json.loads(text, parse_float=float)
+    ]
+
+
+def account_payload(balances):
+    return json.dumps({
+        "makerCommission": 15, "takerCommission": 15, "buyerCommission": 0, "sellerCommission": 0,
+        "canTrade": True, "canWithdraw": True, "canDeposit": True, "updateTime": 123456789,
+        "accountType": "SPOT",
+        "balances": [{"asset": "COIN{}".format(i), "free": "{:.8f}".format(i * 1.5), "locked": "0.00000000"}
+                     for i in range(balances)],
+        "permissions": ["SPOT"]
+    }, separators=(',', ':'))
+
+
+def open_orders_payload(orders):
+    return json.dumps([{
+        "symbol": "NEOUSDT", "orderId": 1000 + i, "orderListId": -1, "clientOrderId": "myOrder{}".format(i),
+        "price": "{:.8f}".format(30 + i * 0.01), "origQty": "1.00000000", "executedQty": "0.00000000",
+        "cummulativeQuoteQty": "0.00000000", "status": "NEW", "timeInForce": "GTC", "type": "LIMIT",
+        "side": "BUY" if i % 2 else "SELL", "stopPrice": "0.00000000", "icebergQty": "0.00000000",
+        "time": 1499827319559, "updateTime": 1499827319559, "isWorking": True, "origQuoteOrderQty": "0.00000000"
+    } for i in range(orders)], separators=(',', ':'))
+
+
+def allocated(function, ticks):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [function() for _ in range(ticks)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size / ticks
+
+
+def compare(name, legacy, typed, number):
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=5)) / number
+    typed_time = min(timeit.repeat(typed, number=number, repeat=5)) / number
+    print(f"{name:<24} legacy {legacy_time * 1e6:10.2f} us   typed {typed_time * 1e6:10.2f} us   "
+          f"x{legacy_time / typed_time:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--balances", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=10000)
+    args = parser.parse_args()
+
+    ticker = '{"symbol":"NEOUSDT","price":"40.12000000"}'
+    account = account_payload(args.balances)
+    asset = "COIN{}".format(args.balances // 2)
+    decode_wallet = wallet_decoder(asset)
+    orders = open_orders_payload(args.orders)
+    assert legacy_wallet(account, asset) == decode_wallet(account).available
+    assert len(legacy_open_orders(orders)) == len(decode_open_orders(orders))
+
+    compare("ticker tick", lambda: legacy_tick(ticker), lambda: typed_tick(ticker), 20000)
+    compare(f"account ({args.balances} assets)", lambda: legacy_wallet(account, asset),
+            lambda: decode_wallet(account), 200)
+    compare(f"openOrders ({args.orders})", lambda: legacy_open_orders(orders),
+            lambda: decode_open_orders(orders), 20)
+
+    legacy_bytes = allocated(lambda: legacy_ticker(ticker), args.ticks)
+    typed_bytes = allocated(lambda: decode_ticker(ticker), args.ticks)
+    print(f"{'retained per ticker':<24} legacy {legacy_bytes:8.0f} B    typed {typed_bytes:8.0f} B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Write and read throughput of the tick files against one JSON line per tick.
+
+    python -m src.bench.recorder --rows 1000000
+
+Both formats store the same rows. Reading means loading every row and computing the
+volume weighted price, the first step of any replay.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.client import SIDE_NONE
+from src.recorder import TICKER, TickReader, TickRecorder
+
+
+def rows_of(count):
+    prices = 40.0 + np.cumsum(np.random.default_rng(0).normal(0, 0.01, count))
+    return [(1600000000000000000 + i * 1000000, float(price), 1.0) for i, price in enumerate(prices)]
+
+
+def write_ticks(directory, rows):
+    recorder = TickRecorder(directory)
+    for timestamp, price, qty in rows:
+        recorder.record("NEOUSDT", TICKER, price, qty, SIDE_NONE, timestamp)
+    recorder.close()
+
+
+def read_ticks(directory):
+    ticks = TickReader(directory).read("NEOUSDT", TICKER)
+    return len(ticks.price), float(np.dot(ticks.price, ticks.qty) / ticks.qty.sum())
+
+
+def write_json_lines(path, rows):
+    with open(path, "w") as f:
+        for timestamp, price, qty in rows:
+            f.write(json.dumps({"timestamp": timestamp, "price": price, "qty": qty, "side": SIDE_NONE}))
+            f.write("\n")
+
+
+def read_json_lines(path):
+    volume = value = 0.0
+    count = 0
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            volume += row["qty"]
+            value += row["price"] * row["qty"]
+            count += 1
+    return count, value / volume
+
+
+def measure(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rows = rows_of(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "ticks.jsonl")
+        tick_write, _ = measure(write_ticks, directory, rows)
+        json_write, _ = measure(write_json_lines, json_path, rows)
+        tick_read, (tick_rows, tick_vwap) = measure(read_ticks, directory)
+        json_read, (json_rows, json_vwap) = measure(read_json_lines, json_path)
+
+    assert tick_rows == json_rows == args.rows
+    assert abs(tick_vwap - json_vwap) < 1e-6
+    print(f"rows: {args.rows}")
+    print(f"{'':<12} {'write rows/s':>14} {'read rows/s':>14}")
+    print(f"{'tick files':<12} {args.rows / tick_write:14,.0f} {args.rows / tick_read:14,.0f}")
+    print(f"{'json lines':<12} {args.rows / json_write:14,.0f} {args.rows / json_read:14,.0f}")
+    print(f"read speedup: x{json_read / tick_read:.1f}")
+
+
+if __name__ == '__main__':
+    main()
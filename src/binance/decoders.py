@@ -0,0 +1,112 @@
+"""
+Per-endpoint decoders of Binance responses.
+Each one takes the raw response text and pulls out only the fields the bot uses,
+instead of building the whole JSON document.
+Fields are matched one key at a time, so whitespace and key order of the response do not matter.
+"""
+import json
+import re
+from typing import Dict, List
+
+from src.client import NO_PRICE, OpenOrder, Ticker, Wallet
+
+
+def field(name, value=r'"([^"]*)"'):
+    """
+    :return: regex of a JSON key and its value, string values by default
+    """
+    return re.compile(r'"{}"\s*:\s*{}'.format(name, value))
+
+
+SYMBOL = field("symbol")
+PRICE = field("price")
+ORDER_ID = field("orderId", r"(\d+)")
+ORIG_QTY = field("origQty")
+SIDE = field("side")
+FREE = field("free")
+
+
+class DecodeException(Exception):
+    pass
+
+
+def decode_json(text):
+    return json.loads(text, parse_float=float)
+
+
+def decode_ticker(text) -> Ticker:
+    """
+    api/v3/ticker/price?symbol=
+    {"symbol":"NEOUSDT","price":"40.12000000"}
+    """
+    match = PRICE.search(text)
+    if match is None:
+        raise DecodeException("ticker price not found in {}".format(text))
+    return Ticker(bid=NO_PRICE, ask=NO_PRICE, last=float(match.group(1)))
+
+
+def columns(text, *fields):
+    """
+    :return: values of every field, one list per field in the order of the objects
+    Every object of the response holds every field, so the lists line up
+    """
+    values = [regex.findall(text) for regex in fields]
+    if len({len(column) for column in values}) > 1:
+        raise DecodeException("fields do not line up in {}".format(text[:200]))
+    return values
+
+
+def tickers_decoder(symbols):
+    """
+    api/v3/ticker/price
+    [{"symbol":"ETHBTC","price":"0.03"}, ...]
+    :return: decoder keeping only the given symbols
+    A set is kept by reference, symbols added to it before the response arrives are decoded too
+    """
+    wanted = symbols if isinstance(symbols, (set, frozenset)) else set(symbols)
+
+    def decode_tickers(text) -> Dict[str, Ticker]:
+        return {
+            symbol: Ticker(bid=NO_PRICE, ask=NO_PRICE, last=float(price))
+            for symbol, price in zip(*columns(text, SYMBOL, PRICE)) if symbol in wanted
+        }
+
+    return decode_tickers
+
+
+def wallet_decoder(asset):
+    """
+    api/v3/account
+    {..., "balances":[{"asset":"BTC","free":"4723846.89208129","locked":"0.00000000"}, ...]}
+    :return: decoder of the free balance of the asset, 0 when the account does not hold it
+    """
+    quoted = '"{}"'.format(asset)
+    asset_field = field("asset", re.escape(quoted))
+
+    def decode_wallet(text) -> Wallet:
+        start = text.find(quoted)
+        while start >= 0:
+            balance = text[text.rfind("{", 0, start):text.find("}", start) + 1]
+            if asset_field.search(balance):
+                match = FREE.search(balance)
+                if match is None:
+                    raise DecodeException("free balance of {} not found in {}".format(asset, balance))
+                return Wallet(available=float(match.group(1)))
+            start = text.find(quoted, start + 1)
+        if '"balances"' not in text:
+            raise DecodeException("balances not found in {}".format(text[:200]))
+        return Wallet(available=0.0)
+
+    return decode_wallet
+
+
+def decode_open_orders(text) -> List[OpenOrder]:
+    """
+    api/v3/openOrders
+    [{"symbol":"LTCBTC","orderId":1,...,"price":"0.1","origQty":"1.0",...,"side":"BUY",...}, ...]
+    Only the used fields of each order are read
+    """
+    return [
+        OpenOrder(float(price), int(order_id), float(amount), side)
+        for price, order_id, amount, side in zip(*columns(text, PRICE, ORDER_ID, ORIG_QTY, SIDE))
+    ]
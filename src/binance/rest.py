@@ -1,12 +1,18 @@
-import asyncio
 import base64
 import hashlib
 import hmac
-import json
+import re
 import time
+from decimal import Decimal
 
-import aiohttp
-from src.client import Client, Ticker, Wallet, OpenOrder
+from src.binance.decoders import decode_json, decode_open_orders, decode_ticker, tickers_decoder, wallet_decoder
+from src.client import CancelReplaceException, Client
+from src.session import SESSION_POOL, SessionPool
+from src.sync_bridge import BRIDGE, DEFAULT_TIMEOUT
+from src.tracing import TRACER
+
+
+CANCEL_SUCCEEDED = re.compile(r'"cancelResult"\s*:\s*"SUCCESS"')
 
 
 class FetchException(Exception):
@@ -15,15 +21,17 @@ class FetchException(Exception):
 
 class BinanceClient(Client):
 
-    def __init__(self, API_KEY, API_SECRET, host="https://api.binance.com"):
+    def __init__(self, API_KEY, API_SECRET, host="https://api.binance.com", pool: SessionPool = SESSION_POOL):
         self.API_KEY = API_KEY
         self.API_SECRET = API_SECRET
         self.host = host
+        self.pool = pool
 
-    async def post(self, endpoint, params=""):
+    async def post(self, endpoint, params="", decoder=decode_json):
         """
         :param endpoint:
         :param params:
+        :param decoder: turns the response text into the returned value
         :return:
         """
         signature = self.signature_payload(params)
@@ -33,20 +41,42 @@ class BinanceClient(Client):
             params = "?{}&signature={}".format(params, signature)
         url = '{}/{}{}'.format(self.host, endpoint, params)
         headers = self.generate_headers()
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers) as resp:
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().post(url, headers=headers) as resp:
                 text = await resp.text()
                 if resp.status < 200 or resp.status > 299:
                     raise FetchException('POST {} failed with status {} - {}'
                                          .format(url, resp.status, text))
-                parsed = json.loads(text, parse_float=float)
-                return parsed
+                return decoder(text)
 
-    async def fetch(self, endpoint, params="", is_public=False):
+    async def delete(self, endpoint, params="", decoder=decode_json):
+        """
+        :param endpoint:
+        :param params:
+        :param decoder: turns the response text into the returned value
+        :return:
+        """
+        signature = self.signature_payload(params)
+        if params.strip() == "":
+            params = "?{}signature={}".format(params, signature)
+        else:
+            params = "?{}&signature={}".format(params, signature)
+        url = '{}/{}{}'.format(self.host, endpoint, params)
+        headers = self.generate_headers()
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().delete(url, headers=headers) as resp:
+                text = await resp.text()
+                if resp.status < 200 or resp.status > 299:
+                    raise FetchException('DELETE {} failed with status {} - {}'
+                                         .format(url, resp.status, text))
+                return decoder(text)
+
+    async def fetch(self, endpoint, params="", is_public=False, decoder=decode_json):
         """
         :param endpoint:
         :param params:
         :param is_public:
+        :param decoder: turns the response text into the returned value
         :return:
         """
         signature = self.signature_payload(params)
@@ -59,14 +89,13 @@ class BinanceClient(Client):
 
         url = '{}/{}{}'.format(self.host, endpoint, params)
         headers = self.generate_headers()
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as resp:
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().get(url, headers=headers) as resp:
                 text = await resp.text()
                 if resp.status != 200:
                     raise FetchException('GET {} failed with status {} - {}'
                                          .format(url, resp.status, text))
-                parsed = json.loads(text, parse_float=float)
-                return parsed
+                return decoder(text)
 
     def signature_payload(self, data):
         signature = hmac.new(self.API_SECRET.encode('utf-8'), data.encode('utf-8'), hashlib.sha256).hexdigest()
@@ -105,12 +134,10 @@ class BinanceClient(Client):
             }
         :raises: BinanceRequestException, BinanceAPIException
         """
-        order_books = None
         try:
-            request = "/api/v3/depth"
+            request = "api/v3/depth"
             paydata = "symbol={}".format(market)
-            order_books = await self.fetch(endpoint=request, params=paydata)
-            return order_books
+            return await self.fetch(endpoint=request, params=paydata, is_public=True)
         except FetchException as e:
             print(e)
             return None
@@ -118,11 +145,9 @@ class BinanceClient(Client):
             print(e)
             return None
 
-    def order_book_synchronized(self, market):
+    def order_book_synchronized(self, market, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_ticker(market))
-            order_book = asyncio.get_event_loop().run_until_complete(t)
-            return order_book
+            return BRIDGE.run_sync(self.order_book(market), timeout)
         except Exception as e:
             print(e)
             return None
@@ -132,12 +157,7 @@ class BinanceClient(Client):
             request = 'api/v3/account'
             nonce = str(int(time.time() * 1000))
             paydata = "timestamp={}".format(nonce)
-            wallet = await self.fetch(endpoint=request, params=paydata)
-            balance = 0.0
-            for wallet in wallet["balances"]:
-                if wallet["asset"] == symbol:
-                    balance = wallet["free"]
-            return Wallet(available=str(balance))
+            return await self.fetch(endpoint=request, params=paydata, decoder=wallet_decoder(symbol))
         except FetchException as e:
             print(e)
             return None
@@ -145,11 +165,9 @@ class BinanceClient(Client):
             print(e)
             return None
 
-    def get_wallets_synchronized(self, market):
+    def get_wallets_synchronized(self, market, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_wallet(market))
-            wallets = asyncio.get_event_loop().run_until_complete(t)
-            return wallets
+            return BRIDGE.run_sync(self.get_wallet(market), timeout)
         except Exception as e:
             print(e)
             return None
@@ -162,18 +180,68 @@ class BinanceClient(Client):
                 f"symbol={symbol}",
                 f"timestamp={nonce}"
             ]
-            orders = await self.fetch(endpoint=request, params=self.list_to_string(paydata))
-            open_orders = []
-            for order in orders:
-                open_orders.append(
-                    OpenOrder(
-                        price=order["price"],
-                        amount=order["origQty"],
-                        side=order["side"],
-                        order_id=order["orderId"]
-                    )
-                )
-            return open_orders
+            return await self.fetch(endpoint=request, params=self.list_to_string(paydata), decoder=decode_open_orders)
+        except FetchException as e:
+            print(e)
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+    async def cancel_all(self, symbol):
+        """
+        :param symbol: Ex: NEOUSDT
+        :return: list of canceled orders
+        Cancel every open order of the symbol with a single request
+        """
+        try:
+            request = "api/v3/openOrders"
+            nonce = str(int(time.time() * 1000))
+            paydata = [
+                f"symbol={symbol}",
+                "recvWindow=5000",
+                f"timestamp={nonce}"
+            ]
+            return await self.delete(endpoint=request, params=self.list_to_string(paydata))
+        except FetchException as e:
+            print(e)
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+    async def cancel_order(self, symbol, order_id):
+        try:
+            request = "api/v3/order"
+            nonce = str(int(time.time() * 1000))
+            paydata = [
+                f"symbol={symbol}",
+                f"orderId={order_id}",
+                "recvWindow=5000",
+                f"timestamp={nonce}"
+            ]
+            return await self.delete(endpoint=request, params=self.list_to_string(paydata))
+        except FetchException as e:
+            print(e)
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+    async def get_order(self, symbol, order_id):
+        """
+        https://binance-docs.github.io/apidocs/spot/en/#query-order-user_data
+        """
+        try:
+            request = "api/v3/order"
+            nonce = str(int(time.time() * 1000))
+            paydata = [
+                f"symbol={symbol}",
+                f"orderId={order_id}",
+                "recvWindow=5000",
+                f"timestamp={nonce}"
+            ]
+            return await self.fetch(endpoint=request, params=self.list_to_string(paydata))
         except FetchException as e:
             print(e)
             return None
@@ -181,12 +249,59 @@ class BinanceClient(Client):
             print(e)
             return None
 
+    async def cancel_replace(self, symbol, order_id, side, price, amount):
+        """
+        Cancel of order_id and new limit order in one request, the new order is not sent when the cancel fails
+        :raise CancelReplaceException: the order is canceled and the new order rejected
+        https://binance-docs.github.io/apidocs/spot/en/#cancel-an-existing-order-and-send-a-new-order-trade
+        """
+        try:
+            request = "api/v3/order/cancelReplace"
+            nonce = str(int(time.time() * 1000))
+            paydata = [
+                f"symbol={symbol}",
+                "side={}".format(side.upper()),
+                "type=LIMIT",
+                "cancelReplaceMode=STOP_ON_FAILURE",
+                "timeInForce=GTC",
+                "quantity={}".format(self.decimal_string(amount)),
+                "price={}".format(round(price, 3)),
+                f"cancelOrderId={order_id}",
+                "recvWindow=5000",
+                f"timestamp={nonce}"
+            ]
+            replaced = await self.post(endpoint=request, params=self.list_to_string(paydata))
+            return replaced["newOrderResponse"]
+        except FetchException as e:
+            if CANCEL_SUCCEEDED.search(str(e)):  # 409, the order is canceled and the new one rejected
+                raise CancelReplaceException(symbol, order_id, e) from e
+            print(e)
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
     async def get_ticker(self, paritet):
         try:
             request = 'api/v3/ticker/price'
             paydata = "symbol={}".format(paritet)
-            ticker = await self.fetch(endpoint=request, params=paydata, is_public=True)
-            return Ticker(last=ticker["price"], ask="", bid="")
+            return await self.fetch(endpoint=request, params=paydata, is_public=True, decoder=decode_ticker)
+        except FetchException as e:
+            print(e)
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+    async def get_tickers(self, symbols):
+        """
+        :param symbols: iterable of paritets. Ex: ["NEOUSDT", "BTCUSDT"]
+        :return: Dict[str, Ticker] for requested symbols only
+        One request for every symbol on the exchange
+        """
+        try:
+            request = 'api/v3/ticker/price'
+            return await self.fetch(endpoint=request, is_public=True, decoder=tickers_decoder(symbols))
         except FetchException as e:
             print(e)
             return None
@@ -194,11 +309,9 @@ class BinanceClient(Client):
             print(e)
             return None
 
-    def get_tickers_synchronized(self, symbol):
+    def get_tickers_synchronized(self, symbol, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_ticker(symbol))
-            ticker = asyncio.get_event_loop().run_until_complete(t)
-            return ticker
+            return BRIDGE.run_sync(self.get_ticker(symbol), timeout)
         except Exception as e:
             print(e)
             return None
@@ -210,7 +323,7 @@ class BinanceClient(Client):
             paydata = [
                 "symbol={}".format(market),
                 "side=BUY",
-                "quantity={}".format(amount),
+                "quantity={}".format(self.decimal_string(amount)),
                 "type={}".format("MARKET"),
                 "timestamp={}".format(nonce)
             ]
@@ -230,7 +343,7 @@ class BinanceClient(Client):
             paydata = [
                 "symbol={}".format(market),
                 "side=SELL",
-                "quantity={}".format(amount),
+                "quantity={}".format(self.decimal_string(amount)),
                 "type={}".format("MARKET"),
                 "timestamp={}".format(nonce)
             ]
@@ -251,7 +364,7 @@ class BinanceClient(Client):
                 "side=BUY",
                 "type={}".format("LIMIT"),
                 "timeInForce=GTC",
-                "quantity={}".format(amount),
+                "quantity={}".format(self.decimal_string(amount)),
                 "price={}".format(round(price, 3)),
                 "recvWindow=5000",
                 "timestamp={}".format(nonce)
@@ -272,7 +385,7 @@ class BinanceClient(Client):
             paydata = [
                 "symbol={}".format(paritet),
                 "side=SELL",
-                "quantity={}".format(amount),
+                "quantity={}".format(self.decimal_string(amount)),
                 "timeInForce=GTC",
                 "type={}".format("LIMIT"),
                 "recvWindow=5000",
@@ -287,24 +400,27 @@ class BinanceClient(Client):
             print(e)
             return None
 
-    def buy_order_market_synchronized(self, market, amount):
+    def buy_order_market_synchronized(self, market, amount, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.buy_order_market(market, amount))
-            order = asyncio.get_event_loop().run_until_complete(t)
-            return order
+            return BRIDGE.run_sync(self.buy_order_market(market, amount), timeout)
         except Exception as e:
             print(e)
             return None
 
-    def sell_order_market_synchronized(self, market, amount):
+    def sell_order_market_synchronized(self, market, amount, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.sell_order_market(market, amount))
-            order = asyncio.get_event_loop().run_until_complete(t)
-            return order
+            return BRIDGE.run_sync(self.sell_order_market(market, amount), timeout)
         except Exception as e:
             print(e)
             return None
 
+    @staticmethod
+    def decimal_string(value):
+        """
+        Fixed-point text of a number, Binance rejects exponents. Ex: 1e-05 => 0.00001
+        """
+        return format(Decimal(str(value)), "f")
+
     @staticmethod
     def list_to_string(paydata):
         return "&".join(paydata)
@@ -1,16 +1,17 @@
-import asyncio
-from bfxapi import Order
-from bfxapi.rest.bfx_rest import BfxRest
-from src.client import Client, Ticker, Wallet
+from src.bitfinex.transport import BitfinexRest
+from src.client import BUY, Client, Fill
+from src.sync_bridge import BRIDGE, DEFAULT_TIMEOUT
 
 
 class BfxClientWrapper(Client):
+    LIMIT = "LIMIT"  # use "EXCHANGE LIMIT" / "EXCHANGE MARKET" to trade from the exchange wallet
+    MARKET = "MARKET"
+    WALLET = "margin"  # wallet the order types trade from, "exchange" for the EXCHANGE order types
 
     def __init__(self, API_KEY, API_SECRET):
-        self.client = BfxRest(
+        self.client = BitfinexRest(
             API_KEY=API_KEY,
-            API_SECRET=API_SECRET,
-            logLevel='DEBUG'
+            API_SECRET=API_SECRET
         )
 
     async def platform_status(self):
@@ -21,9 +22,8 @@ class BfxClientWrapper(Client):
             print(e)
             return None
 
-    def get_platform_status(self):
-        t = asyncio.ensure_future(self.platform_status())
-        status = asyncio.get_event_loop().run_until_complete(t)
+    def get_platform_status(self, timeout=DEFAULT_TIMEOUT):
+        status = BRIDGE.run_sync(self.platform_status(), timeout)
         return status[0]
 
     async def get_ticker(self, symbol):
@@ -32,71 +32,74 @@ class BfxClientWrapper(Client):
 
         symbol = format: t{}{} -> %First currency, %Second currency
 
-        BfxRest.get_public_ticker(symbol)
+        GET v2/ticker/{symbol}
         """
         try:
-            ticker = await self.client.get_public_ticker(symbol)
-            return Ticker(
-                bid=str(ticker[0]),
-                ask=str(ticker[2]),
-                last=str(ticker[6])
-            )
+            return await self.client.get_ticker(symbol)
         except Exception as e:
             print(e)
             return None
 
-    def get_ticker_synchronized(self, symbol):
+    async def get_tickers(self, symbols):
+        """ Get tickers for all given symbols with a single request.
+
+        symbols = list of t{}{} symbols
+
+        GET v2/tickers?symbols={}
+        """
+        try:
+            return await self.client.get_tickers(symbols)
+        except Exception as e:
+            print(e)
+            return None
+
+    async def order_book(self, symbol):
+        """ Order book of the symbol, split by side
+
+        GET v2/book/{symbol}/P0
+        """
+        try:
+            book = await self.client.get_book(symbol)
+            return {
+                "bids": [[price, amount] for price, _, amount in book if amount > 0],
+                "asks": [[price, -amount] for price, _, amount in book if amount < 0],
+            }
+        except Exception as e:
+            print(e)
+            return None
+
+    def get_ticker_synchronized(self, symbol, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_ticker(symbol))
-            ticker = asyncio.get_event_loop().run_until_complete(t)
-            return ticker
+            return BRIDGE.run_sync(self.get_ticker(symbol), timeout)
         except Exception as e:
             print(e)
             return None
 
     async def get_wallet(self, market):
         try:
-            wallets = await self.client.get_wallets()
-            spec_wallet = next((wallet.balance for wallet in wallets if wallet.currency == market), 0)
-            return Wallet(available=str(spec_wallet))
+            return await self.client.get_wallet(market, self.WALLET)
         except Exception as e:
             print(e)
             return None
 
-    def get_wallet_synchronized(self, market):
+    def get_wallet_synchronized(self, market, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_wallet(market))
-            wallets = asyncio.get_event_loop().run_until_complete(t)
-            return wallets
+            return BRIDGE.run_sync(self.get_wallet(market), timeout)
         except Exception as e:
             print(e)
             return None
 
-    async def post_submit_order(self, symbol, amount, price):
+    async def post_submit_order(self, symbol, amount, price, market_type=LIMIT):
         """ Submit Order
 
         amount = negative for sell, positive for buy
+        price = None for MARKET orders
 
-        BfxRest.submit_order(symbol,
-                             price,
-                             amount,
-                             market_type='LIMIT',
-                             hidden=False,
-                             price_trailing=None,
-                             price_aux_limit=None,
-                             oco_stop_price=None,
-                             close=False,
-                             reduce_only=False,
-                             post_only=False,
-                             oco=False,
-                             aff_code=None,
-                             time_in_force=None,
-                             leverage=None,
-                             gid=None)
+        POST v2/auth/w/order/submit
         """
         order = await self.client.submit_order(
             symbol=symbol,
-            market_type=Order.Type.LIMIT,
+            market_type=market_type,
             amount=amount,
             price=price
         )
@@ -104,14 +107,14 @@ class BfxClientWrapper(Client):
 
     async def sell_order_market(self, symbol, amount):
         try:
-            return await self.post_submit_order(symbol, -amount, 0)
+            return await self.post_submit_order(symbol, -amount, None, self.MARKET)
         except Exception as e:
             print(e)
             return None
 
     async def buy_order_market(self, symbol, amount):
         try:
-            return await self.post_submit_order(symbol, amount, 0)
+            return await self.post_submit_order(symbol, amount, None, self.MARKET)
         except Exception as e:
             print(e)
             return None
@@ -142,21 +145,101 @@ class BfxClientWrapper(Client):
             print(e)
             return None
 
-    def submit_order(self, symbol, amount, price):
+    async def get_open_orders(self, symbol):
+        """ Active orders of the symbol
+
+        POST v2/auth/r/orders/{symbol}
+        """
         try:
-            t = asyncio.ensure_future(self.post_submit_order(
+            return await self.client.get_active_orders(symbol)
+        except Exception as e:
+            print(e)
+            return None
+
+    async def cancel_all(self, symbol):
+        """ Cancel every active order of the symbol with a single request
+
+        POST v2/auth/r/orders/{symbol}
+        POST v2/auth/w/order/cancel/multi {"id": [...]}
+        """
+        try:
+            orders = await self.client.get_active_orders(symbol)
+            if not orders:
+                return []
+            return await self.client.cancel_orders(order[0] for order in orders)
+        except Exception as e:
+            print(e)
+            return None
+
+    async def cancel_order(self, symbol, order_id):
+        """ POST v2/auth/w/order/cancel """
+        try:
+            return await self.client.cancel_order(order_id)
+        except Exception as e:
+            print(e)
+            return None
+
+    async def get_order(self, symbol, order_id):
+        """ Active order, otherwise the closed order
+
+        POST v2/auth/r/orders/{symbol}
+        POST v2/auth/r/orders/{symbol}/hist
+        """
+        try:
+            orders = await self.client.get_active_orders(symbol, [order_id])
+            if not orders:
+                orders = await self.client.get_order_history(symbol, [order_id])
+            return orders[0]
+        except Exception as e:
+            print(e)
+            return None
+
+    async def cancel_replace(self, symbol, order_id, side, price, amount):
+        """ Native amend of price and amount of the order in place
+
+        POST v2/auth/w/order/update
+        """
+        try:
+            return await self.client.update_order(order_id, price, amount if side == BUY else -amount)
+        except Exception as e:
+            print(e)
+            return None
+
+    def submit_order(self, symbol, amount, price, market_type=LIMIT, timeout=DEFAULT_TIMEOUT):
+        try:
+            return BRIDGE.run_sync(self.post_submit_order(
                 symbol=symbol,
                 amount=amount,
-                price=price
-            ))
-            order = asyncio.get_event_loop().run_until_complete(t)
-            return order
+                price=price,
+                market_type=market_type
+            ), timeout)
         except Exception as e:
             print(e)
             return None
 
     def order_buy_market(self, symbol, amount):
-        return self.submit_order(symbol, amount, 0)
+        return self.submit_order(symbol, amount, None, self.MARKET)
 
     def order_sell_market(self, symbol, amount):
-        return self.submit_order(symbol, -amount, 0)
+        return self.submit_order(symbol, -amount, None, self.MARKET)
+
+    @staticmethod
+    def order_of(notification):
+        """
+        [MTS, TYPE, MESSAGE_ID, null, ORDER or [ORDER], CODE, STATUS, TEXT], or ORDER itself from get_order
+        ORDER = [ID, GID, CID, SYMBOL, MTS_CREATE, MTS_UPDATE, AMOUNT, AMOUNT_ORIG, ..., PRICE, PRICE_AVG, ...]
+        """
+        if not isinstance(notification[1], str):  # TYPE of a notification, GID of an order
+            return notification
+        order = notification[4]
+        return order[0] if order and isinstance(order[0], list) else order
+
+    @staticmethod
+    def order_id_of(order):
+        return BfxClientWrapper.order_of(order)[0]
+
+    @staticmethod
+    def fill_of(order, amount, price) -> Fill:
+        order = BfxClientWrapper.order_of(order)
+        executed = abs(order[7]) - abs(order[6])
+        return Fill(qty=executed, quote=executed * (order[17] or order[16]))
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from src.client import SIDE_BUY, SIDE_SELL, Ticker, Wallet
+from src.session import SESSION_POOL, SessionPool
+from src.tracing import TRACER
+
+
+class FetchException(Exception):
+    pass
+
+
+def decode_ticker(ticker) -> Ticker:
+    """
+    [BID, BID_SIZE, ASK, ASK_SIZE, DAILY_CHANGE, DAILY_CHANGE_RELATIVE, LAST_PRICE, VOLUME, HIGH, LOW]
+    """
+    return Ticker(bid=float(ticker[0]), ask=float(ticker[2]), last=float(ticker[6]))
+
+
+class BitfinexRest:
+    """
+    Bitfinex v2 REST transport on a shared connection pool.
+
+    Responses are plain arrays and are handed to the caller as decoded JSON, without model objects.
+    https://docs.bitfinex.com/reference
+    """
+
+    def __init__(self, API_KEY, API_SECRET, host="https://api.bitfinex.com/v2",
+                 public_host="https://api-pub.bitfinex.com/v2", pool: SessionPool = SESSION_POOL):
+        self.API_KEY = API_KEY
+        self.host = host
+        self.public_host = public_host
+        self.pool = pool
+        self.path_prefix = "/api/v2/"
+        self.hmac = hmac.new(API_SECRET.encode('utf-8'), digestmod=hashlib.sha384)
+        self.nonce = 0
+        self.nonce_lock = threading.Lock()
+
+    def next_nonce(self):
+        """
+        Strictly increasing, also when two requests are signed in the same microsecond
+        """
+        with self.nonce_lock:
+            self.nonce = max(self.nonce + 1, int(time.time() * 1000000))
+            return str(self.nonce)
+
+    def signature_payload(self, endpoint, nonce, body):
+        signature = self.hmac.copy()
+        signature.update('{}{}{}{}'.format(self.path_prefix, endpoint, nonce, body).encode('utf-8'))
+        return signature.hexdigest()
+
+    def generate_headers(self, endpoint, body):
+        nonce = self.next_nonce()
+        return {
+            'Content-Type': 'application/json',
+            'bfx-nonce': nonce,
+            'bfx-apikey': self.API_KEY,
+            'bfx-signature': self.signature_payload(endpoint, nonce, body),
+        }
+
+    async def fetch(self, endpoint, params=""):
+        """
+        Public GET request
+        """
+        url = '{}/{}{}'.format(self.public_host, endpoint, params)
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().get(url) as resp:
+                text = await resp.text()
+                if resp.status != 200:
+                    raise FetchException('GET {} failed with status {} - {}'
+                                         .format(url, resp.status, text))
+                return json.loads(text)
+
+    async def post(self, endpoint, data=None):
+        """
+        Authenticated POST request
+        """
+        body = json.dumps(data or {}, separators=(',', ':'))
+        url = '{}/{}'.format(self.host, endpoint)
+        headers = self.generate_headers(endpoint, body)
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().post(url, headers=headers, data=body) as resp:
+                text = await resp.text()
+                if resp.status < 200 or resp.status > 299:
+                    raise FetchException('POST {} failed with status {} - {}'
+                                         .format(url, resp.status, text))
+                return json.loads(text)
+
+    async def get_ticker(self, symbol) -> Ticker:
+        return decode_ticker(await self.fetch("ticker/{}".format(symbol)))
+
+    async def get_tickers(self, symbols) -> Dict[str, Ticker]:
+        """
+        [[SYMBOL, BID, BID_SIZE, ASK, ASK_SIZE, DAILY_CHANGE, DAILY_CHANGE_RELATIVE, LAST_PRICE, ...]]
+        """
+        tickers = await self.fetch("tickers", "?symbols={}".format(",".join(symbols)))
+        return {ticker[0]: decode_ticker(ticker[1:]) for ticker in tickers}
+
+    async def get_wallet(self, currency, wallet_type="exchange") -> Wallet:
+        """
+        [[WALLET_TYPE, CURRENCY, BALANCE, UNSETTLED_INTEREST, AVAILABLE_BALANCE, ...]]
+        wallet_type = exchange / margin / funding
+        """
+        wallets = await self.post("auth/r/wallets")
+        wallet = next((wallet for wallet in wallets if wallet[0] == wallet_type and wallet[1] == currency), None)
+        if wallet is None:
+            return Wallet(available=0.0)
+        available = wallet[4]
+        if available is None:  # not computed yet by Bitfinex, the balance is free once no order locks it
+            available = wallet[2]
+        return Wallet(available=float(available))
+
+    async def get_book(self, symbol, precision="P0"):
+        """
+        [[PRICE, COUNT, AMOUNT]], AMOUNT is positive for bids and negative for asks
+        """
+        return await self.fetch("book/{}/{}".format(symbol, precision))
+
+    async def get_active_orders(self, symbol, order_ids=None):
+        """
+        [[ID, GID, CID, SYMBOL, MTS_CREATE, MTS_UPDATE, AMOUNT, AMOUNT_ORIG, TYPE, ...]]
+        order_ids = None for every active order of the symbol
+        """
+        return await self.post("auth/r/orders/{}".format(symbol), None if order_ids is None else {"id": order_ids})
+
+    async def get_order_history(self, symbol, order_ids):
+        """
+        Closed orders, same arrays as get_active_orders
+        """
+        return await self.post("auth/r/orders/{}/hist".format(symbol), {"id": order_ids})
+
+    async def submit_order(self, symbol, amount, price, market_type):
+        """
+        amount = negative for sell, positive for buy
+        price is not sent for MARKET orders
+        """
+        data = {
+            "type": market_type,
+            "symbol": symbol,
+            "amount": str(amount),
+        }
+        if price is not None:
+            data["price"] = str(price)
+        return await self.post("auth/w/order/submit", data)
+
+    async def cancel_order(self, order_id):
+        return await self.post("auth/w/order/cancel", {"id": order_id})
+
+    async def update_order(self, order_id, price, amount):
+        """
+        amount = negative for sell, positive for buy
+        """
+        return await self.post("auth/w/order/update", {"id": order_id, "price": str(price), "amount": str(amount)})
+
+    async def cancel_orders(self, order_ids):
+        return await self.post("auth/w/order/cancel/multi", {"id": list(order_ids)})
+
+
+class BitfinexWebsocket:
+    """
+    Public Bitfinex v2 websocket on the shared connection pool.
+    Keeps the latest Ticker of every subscribed symbol and calls the listeners on each ticker
+    and each executed trade.
+
+    Usage:
+        ws = BitfinexWebsocket()
+        ws.subscribe_ticker("tNEOUSD", lambda symbol, ticker: ...)
+        ws.subscribe_trades("tNEOUSD", lambda symbol, price, qty, side, timestamp: ...)
+        asyncio.ensure_future(ws.run())
+    """
+
+    def __init__(self, url="wss://api-pub.bitfinex.com/ws/2", pool: SessionPool = SESSION_POOL, reconnect_delay=1.0):
+        self.url = url
+        self.pool = pool
+        self.reconnect_delay = reconnect_delay
+        self.tickers: Dict[str, Ticker] = {}
+        self.listeners: Dict[str, list] = {}
+        self.trade_listeners: Dict[str, list] = {}
+        self.channels: Dict[int, Tuple[str, str]] = {}  # chanId: (channel, symbol)
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.stopped = False
+
+    def subscribe_ticker(self, symbol, listener: Optional[Callable[[str, Ticker], None]] = None):
+        listeners = self.listeners.setdefault(symbol, [])
+        if listener is not None:
+            listeners.append(listener)
+
+    def subscribe_trades(self, symbol, listener: Callable[[str, float, float, int, int], None]):
+        """
+        :param listener: called with (symbol, price, qty, side, timestamp in ns) for every executed trade,
+            side is SIDE_BUY when the taker bought
+        """
+        self.trade_listeners.setdefault(symbol, []).append(listener)
+
+    def get_ticker(self, symbol) -> Optional[Ticker]:
+        return self.tickers.get(symbol)
+
+    async def run(self):
+        while not self.stopped:
+            try:
+                async with self.pool.get().ws_connect(self.url, heartbeat=30) as ws:
+                    self.ws = ws
+                    self.channels = {}
+                    for symbol in self.listeners:
+                        await ws.send_str(json.dumps({"event": "subscribe", "channel": "ticker", "symbol": symbol}))
+                    for symbol in self.trade_listeners:
+                        await ws.send_str(json.dumps({"event": "subscribe", "channel": "trades", "symbol": symbol}))
+                    async for message in ws:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        self.on_message(json.loads(message.data))
+            except Exception as e:
+                print(e)
+            self.ws = None
+            if not self.stopped:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def on_message(self, message):
+        if isinstance(message, dict):
+            if message.get("event") == "subscribed":
+                self.channels[message["chanId"]] = (message["channel"], message["symbol"])
+            elif message.get("event") == "error":
+                print(message)
+            return
+
+        channel, symbol = self.channels.get(message[0], (None, None))
+        if symbol is None or message[1] == "hb":
+            return
+        if channel == "trades":
+            self.on_trades(symbol, message)
+            return
+        ticker = decode_ticker(message[1])
+        self.tickers[symbol] = ticker
+        for listener in self.listeners[symbol]:
+            listener(symbol, ticker)
+
+    def on_trades(self, symbol, message):
+        """
+        Snapshot: [CHANNEL_ID, [[ID, MTS, AMOUNT, PRICE], ...]]
+        Update: [CHANNEL_ID, "te", [ID, MTS, AMOUNT, PRICE]], "tu" repeats an executed trade and is skipped
+        AMOUNT is negative when the taker sold
+        """
+        if message[1] == "te":
+            trades = [message[2]]
+        elif isinstance(message[1], list):
+            trades = message[1]
+        else:
+            return
+        for _, timestamp, amount, price in trades:
+            side = SIDE_BUY if amount > 0 else SIDE_SELL
+            for listener in self.trade_listeners[symbol]:
+                listener(symbol, price, abs(amount), side, timestamp * 1000000)
+
+    async def close(self):
+        self.stopped = True
+        if self.ws is not None:
+            await self.ws.close()
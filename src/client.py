@@ -1,30 +1,58 @@
 from abc import abstractmethod
+from typing import Dict, NamedTuple
 
+NO_PRICE = float("nan")  # price the exchange endpoint does not provide
+BUY = "buy"
+SELL = "sell"
+SIDE_NONE = 0  # side of recorded rows and ledger fills
+SIDE_BUY = 1
+SIDE_SELL = -1
 
-class Ticker:
-    def __init__(self, bid: str, ask: str, last: str):
-        self.bid = bid
-        self.ask = ask
-        self.last = last
 
+class Ticker(NamedTuple):
+    bid: float
+    ask: float
+    last: float
 
-class Wallet:
-    def __init__(self, available: str):
-        self.available = available
 
+class Wallet(NamedTuple):
+    available: float
 
-class OpenOrder:
-    def __init__(self, price, order_id, amount, side):
-        self.price = price
+
+class Fill(NamedTuple):
+    qty: float  # executed amount, in first part of pair
+    quote: float  # executed value, in second part of pair
+
+    @property
+    def price(self):
+        return self.quote / self.qty if self.qty else NO_PRICE
+
+
+class OpenOrder(NamedTuple):
+    price: float
+    order_id: int
+    amount: float
+    side: str
+
+
+class CancelReplaceException(Exception):
+    """
+    The old order was canceled but the new order was rejected: the level has no order on the exchange
+    """
+
+    def __init__(self, symbol, order_id, reason):
+        super().__init__(f"{symbol} order {order_id} canceled, replacement rejected: {reason}")
+        self.symbol = symbol
         self.order_id = order_id
-        self.amount = amount
-        self.side = side
 
 
 class Client:
     @abstractmethod
     async def get_ticker(self, paritet) -> Ticker: pass
 
+    @abstractmethod
+    async def get_tickers(self, symbols) -> Dict[str, Ticker]: pass
+
     @abstractmethod
     async def get_wallet(self, paritet) -> Wallet: pass
 
@@ -42,3 +70,61 @@ class Client:
 
     @abstractmethod
     async def get_open_orders(self, symbol): pass
+
+    @abstractmethod
+    async def order_book(self, paritet):
+        """
+        :return: {"bids": [[price, qty], ...], "asks": [[price, qty], ...]}, best levels first
+        """
+
+    @abstractmethod
+    async def cancel_all(self, symbol): pass
+
+    @abstractmethod
+    async def cancel_order(self, symbol, order_id): pass
+
+    @abstractmethod
+    async def get_order(self, symbol, order_id):
+        """
+        :return: status of an open or closed order, read by fill_of. None when the request failed
+        """
+
+    async def cancel_replace(self, symbol, order_id, side, price, amount):
+        """
+        :param symbol: paritet in the format of the exchange
+        :param order_id: order to cancel
+        :param side: BUY / SELL of the new limit order
+        :param price: price of the new limit order
+        :param amount: amount of the new limit order
+        :return: response of the new order, None when the cancel failed and nothing was sent
+        :raise CancelReplaceException: the old order is gone and the new one was rejected
+
+        Fallback for exchanges without a native cancel-replace: the new order is sent once the
+        cancel is confirmed, because it usually needs the funds the old order still locks.
+        """
+        canceled = await self.cancel_order(symbol, order_id)
+        if canceled is None:  # filled, already gone or unknown after a network error: keep the old order
+            return None
+        place = self.buy_order_limit if side == BUY else self.sell_order_limit
+        order = await place(symbol, price, amount)
+        if order is None:
+            raise CancelReplaceException(symbol, order_id, "new order failed")
+        return order
+
+    @staticmethod
+    def order_id_of(order):
+        """
+        :param order: response of a new order
+        :return: id of the order on the exchange
+        """
+        return order["orderId"]
+
+    @staticmethod
+    def fill_of(order, amount, price) -> Fill:
+        """
+        :param order: response of a new or canceled order
+        :param amount: amount of the order
+        :param price: limit price of the order
+        :return: part of the order executed so far
+        """
+        return Fill(qty=float(order["executedQty"]), quote=float(order["cummulativeQuoteQty"]))
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.client import Client, Fill, Ticker, Wallet
+
+
+class CredentialException(Exception):
+    pass
+
+
+class Credential(NamedTuple):
+    name: str
+    api_key: str
+    api_secret: str
+    pairs: Tuple[str, ...] = ()  # pairs pinned to this sub-account
+
+
+def load_credentials(stock, path=None, environ=None) -> List[Credential]:
+    """
+    :param stock: exchange name. Ex: BINANCE
+    :param path: json file, {"BINANCE": [{"name": "sub-1", "api_key": "...", "api_secret": "...", "pairs": ["NEOUSDT"]}]}
+    :param environ: defaults to os.environ, read when path is None:
+        BINANCE_API_KEY / BINANCE_API_SECRET for the main account
+        BINANCE_API_KEY_<NAME> / BINANCE_API_SECRET_<NAME> for every sub-account
+    :return: credentials of the exchange
+    """
+    if path is not None:
+        with open(path) as f:
+            entries = json.load(f).get(stock, [])
+        credentials = [
+            Credential(
+                name=entry.get("name", str(i)),
+                api_key=entry["api_key"],
+                api_secret=entry["api_secret"],
+                pairs=tuple(entry.get("pairs", ()))
+            )
+            for i, entry in enumerate(entries)
+        ]
+    else:
+        environ = os.environ if environ is None else environ
+        prefix = f"{stock}_API_KEY"
+        credentials = []
+        for variable, api_key in sorted(environ.items()):
+            if variable != prefix and not variable.startswith(prefix + "_"):
+                continue
+            suffix = variable[len(prefix):]
+            api_secret = environ.get(f"{stock}_API_SECRET{suffix}")
+            if api_secret is None:
+                raise CredentialException(f"{variable} has no matching {stock}_API_SECRET{suffix}")
+            credentials.append(Credential(name=suffix.lstrip("_").lower() or "main", api_key=api_key,
+                                          api_secret=api_secret))
+    if not credentials:
+        raise CredentialException(f"No {stock} credentials found in {path or 'environment'}")
+    return credentials
+
+
+class RateWindow:
+    """
+    Request weight sent in the last `window` seconds, mirrors the per-key limit of the exchange
+    """
+
+    def __init__(self, limit, window):
+        """
+        :param limit: max request weight per window
+        :param window: in seconds
+        """
+        self.limit = limit
+        self.window = window
+        self.sent = deque()  # (time, weight)
+        self.used = 0
+        self.lock = threading.Lock()  # the stop loss guard sends from its own thread
+
+    def prune(self, now):
+        while self.sent and self.sent[0][0] <= now - self.window:
+            self.used -= self.sent.popleft()[1]
+
+    def headroom(self):
+        with self.lock:
+            self.prune(time.monotonic())
+            return self.limit - self.used
+
+    def try_hit(self, weight=1) -> float:
+        """
+        :return: 0 when the request was counted, otherwise seconds to wait for headroom
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.prune(now)
+            if self.used + weight <= self.limit or not self.sent:
+                self.sent.append((now, weight))
+                self.used += weight
+                return 0
+            return self.sent[0][0] + self.window - now
+
+
+class KeySlot:
+    def __init__(self, credential: Credential, client: Client, rate: RateWindow):
+        self.credential = credential
+        self.client = client
+        self.rate = rate
+        self.pairs: List[str] = []
+
+    async def acquire(self, weight=1):
+        """
+        Waits until the key has headroom, a key over its limit gets banned by the exchange
+        """
+        while True:
+            delay = self.rate.try_hit(weight)
+            if not delay:
+                return self.client
+            await asyncio.sleep(delay)
+
+
+class CredentialPool:
+    """
+    Sub-account keys of one exchange, each one with its own client and rate limit.
+
+    Every pair sticks to one key: orders, wallets and cancels of the pair are signed by the
+    sub-account holding its balance. New pairs go to the key trading the fewest pairs.
+    Public requests carry no account state and go to the key with the most headroom.
+
+    Usage:
+        pool = CredentialPool(load_credentials("BINANCE"), lambda c: BinanceClient(c.api_key, c.api_secret))
+        client = pool.client("NEOUSDT")
+    """
+
+    def __init__(self, credentials: List[Credential], client_factory: Callable[[Credential], Client],
+                 limit=50, window=10):
+        """
+        :param limit: max request weight of a key per window
+        :param window: in seconds
+        """
+        self.slots = [KeySlot(credential, client_factory(credential), RateWindow(limit, window))
+                      for credential in credentials]
+        self.assignments: Dict[str, KeySlot] = {}
+        for slot in self.slots:
+            for pair in slot.credential.pairs:
+                self.assignments[pair] = slot
+                slot.pairs.append(pair)
+
+    def assign(self, paritet) -> KeySlot:
+        slot = self.assignments.get(paritet)
+        if slot is None:
+            slot = min(self.slots, key=lambda s: len(s.pairs))
+            slot.pairs.append(paritet)
+            self.assignments[paritet] = slot
+        return slot
+
+    def freest(self) -> KeySlot:
+        return max(self.slots, key=lambda s: s.rate.headroom())
+
+    def client(self, paritet) -> "PooledClient":
+        return PooledClient(self, paritet)
+
+    def usage(self) -> Dict[str, int]:
+        """
+        :return: request weight used in the current window per key name
+        """
+        return {slot.credential.name: slot.rate.limit - slot.rate.headroom() for slot in self.slots}
+
+
+class PooledClient(Client):
+    """
+    Client of one pair on a CredentialPool, account requests use the key of the pair
+    """
+
+    def __init__(self, pool: CredentialPool, paritet):
+        self.pool = pool
+        self.paritet = paritet
+        self.slot = pool.assign(paritet)
+
+    @property
+    def credential(self) -> Credential:
+        return self.slot.credential
+
+    def order_id_of(self, order):
+        return self.slot.client.order_id_of(order)
+
+    def fill_of(self, order, amount, price) -> Fill:
+        return self.slot.client.fill_of(order, amount, price)
+
+    async def get_ticker(self, paritet) -> Optional[Ticker]:
+        client = await self.pool.freest().acquire()
+        return await client.get_ticker(paritet)
+
+    async def get_tickers(self, symbols) -> Optional[Dict[str, Ticker]]:
+        client = await self.pool.freest().acquire()
+        return await client.get_tickers(symbols)
+
+    async def order_book(self, paritet):
+        client = await self.pool.freest().acquire()
+        return await client.order_book(paritet)
+
+    async def get_wallet(self, paritet) -> Optional[Wallet]:
+        client = await self.slot.acquire()
+        return await client.get_wallet(paritet)
+
+    async def buy_order_market(self, paritet, amount):
+        client = await self.slot.acquire()
+        return await client.buy_order_market(paritet, amount)
+
+    async def sell_order_market(self, paritet, amount):
+        client = await self.slot.acquire()
+        return await client.sell_order_market(paritet, amount)
+
+    async def buy_order_limit(self, paritet, price, amount):
+        client = await self.slot.acquire()
+        return await client.buy_order_limit(paritet, price, amount)
+
+    async def sell_order_limit(self, paritet, price, amount):
+        client = await self.slot.acquire()
+        return await client.sell_order_limit(paritet, price, amount)
+
+    async def get_open_orders(self, symbol):
+        client = await self.slot.acquire()
+        return await client.get_open_orders(symbol)
+
+    async def cancel_all(self, symbol):
+        client = await self.slot.acquire()
+        return await client.cancel_all(symbol)
+
+    async def cancel_order(self, symbol, order_id):
+        client = await self.slot.acquire()
+        return await client.cancel_order(symbol, order_id)
+
+    async def get_order(self, symbol, order_id):
+        client = await self.slot.acquire()
+        return await client.get_order(symbol, order_id)
+
+    async def cancel_replace(self, symbol, order_id, side, price, amount):
+        """
+        Counted as two requests, the native endpoints weigh a cancel and an order
+        """
+        client = await self.slot.acquire(weight=2)
+        return await client.cancel_replace(symbol, order_id, side, price, amount)
@@ -0,0 +1,232 @@
+import json
+import os
+from typing import List, NamedTuple, Optional
+
+
+class LocalOrder:
+    def __init__(self, buy, sell, amount):
+        self.buy = buy
+        self.sell = sell
+        self.amount = amount
+        self.filled = 0.0  # part of amount executed on the current side by a fill too small for the whole level
+        self.retired = False  # removed from the grid, leaves it once its inventory is sold
+
+    def __str__(self):
+        if self.filled:
+            return f"buy: {self.buy}, sell: {self.sell}, amount:{self.amount}, filled:{self.filled}"
+        return f"buy: {self.buy}, sell: {self.sell}, amount:{self.amount}"
+
+    @property
+    def remaining(self):
+        """
+        Amount the next order of the level sends
+        """
+        return self.amount - self.filled
+
+    @property
+    def key(self):
+        return level_key(self.buy, self.sell)
+
+
+def level_key(buy, sell):
+    """
+    Levels computed from different configurations are the same level when their prices match
+    """
+    return round(buy, 8), round(sell, 8)
+
+
+class GridConfigException(Exception):
+    pass
+
+
+class GridConfig(NamedTuple):
+    first_price: float  # in Second part of pair, Ex: USD
+    last_price: float  # in Second part of pair, Ex: USD
+    step_size: int
+    total_amount: float  # in First part of pair. Ex: NEO
+
+    @property
+    def difference(self):
+        return float(self.last_price - self.first_price) / self.step_size
+
+    @property
+    def amount(self):
+        return float(self.total_amount) / self.step_size
+
+    def validate(self):
+        """
+        :raise GridConfigException: when the config does not describe at least one level
+        """
+        if not isinstance(self.step_size, int) or self.step_size <= 0:
+            raise GridConfigException(f"step_size must be a positive integer, got {self.step_size}")
+        if self.last_price <= self.first_price:
+            raise GridConfigException(f"last_price {self.last_price} must be above first_price {self.first_price}")
+        if self.total_amount <= 0:
+            raise GridConfigException(f"total_amount must be positive, got {self.total_amount}")
+        return self
+
+    def levels(self) -> List[LocalOrder]:
+        table = []
+        for i in range(1, self.step_size + 1):
+            table.append(LocalOrder(
+                buy=self.first_price + self.difference * (i - 1),
+                sell=self.first_price + self.difference * i,
+                amount=self.amount
+            ))
+        return table
+
+
+class GridDiff(NamedTuple):
+    add: List[LocalOrder]  # new levels, waiting to buy
+    cancel: List[LocalOrder]  # levels waiting to buy that leave the grid
+    retire: List[LocalOrder]  # levels holding inventory, partly bought ones too, that leave the grid after their sell
+    keep: List[LocalOrder]
+
+    def is_empty(self):
+        return not (self.add or self.cancel or self.retire)
+
+    def __str__(self):
+        return f"add: {len(self.add)}, cancel: {len(self.cancel)}, retire: {len(self.retire)}, keep: {len(self.keep)}"
+
+
+class GridManager:
+    """
+    Owns the live ping-pong tables and moves the grid without rebuilding it.
+
+    The bot sends an order only when a level triggers, so levels hold no resting exchange orders
+    between ticks: adding and canceling levels is local and costs no exchange call.
+    Levels holding inventory are never dropped, they are retired and leave the grid after their sell.
+    """
+
+    def __init__(self, config: GridConfig):
+        self.config = config.validate()
+        self.bid_ping_table: List[LocalOrder] = config.levels()
+        self.ask_pong_table: List[LocalOrder] = []
+
+    def diff(self, config: GridConfig) -> GridDiff:
+        """
+        :return: minimal change from the live levels to the levels of config
+        """
+        target = {level.key: level for level in config.levels()}
+        add, cancel, retire, keep = [], [], [], []
+        for row in self.bid_ping_table:
+            if row.key in target:
+                keep.append(row)
+            else:
+                (retire if row.filled else cancel).append(row)
+        for row in self.ask_pong_table:
+            if row.key in target:
+                keep.append(row)
+            elif not row.retired:
+                retire.append(row)
+        live = {row.key for row in keep}
+        add = [level for key, level in target.items() if key not in live]
+        return GridDiff(add=add, cancel=cancel, retire=retire, keep=keep)
+
+    def apply(self, config: GridConfig) -> GridDiff:
+        """
+        :raise GridConfigException: the live grid is left unchanged
+        """
+        config.validate()
+        diff = self.diff(config)
+        for row in diff.cancel:
+            self.bid_ping_table.remove(row)
+        for row in diff.retire:
+            row.retired = True
+            if row in self.bid_ping_table:
+                self.hold(row)
+        for row in diff.keep:
+            row.retired = False
+            if row in self.bid_ping_table:
+                row.amount = config.amount  # holding levels keep the amount they bought
+                if row.filled >= row.amount:
+                    self.hold(row)
+        self.bid_ping_table.extend(diff.add)
+        self.config = config
+        return diff
+
+    def hold(self, row: LocalOrder):
+        """
+        A partly bought level stops buying and sells what it bought
+        """
+        self.bid_ping_table.remove(row)
+        row.amount = row.filled
+        row.filled = 0.0
+        self.ask_pong_table.append(row)
+
+    def shift(self, offset) -> GridDiff:
+        """
+        :param offset: in Second part of pair, moves the whole band
+        """
+        config = self.config
+        return self.apply(config._replace(first_price=config.first_price + offset,
+                                          last_price=config.last_price + offset))
+
+    def extend(self, below=0, above=0) -> GridDiff:
+        """
+        :param below: levels added under the band, negative to remove
+        :param above: levels added over the band, negative to remove
+        """
+        config = self.config
+        difference = config.difference
+        step_size = config.step_size + below + above
+        return self.apply(GridConfig(
+            first_price=config.first_price - difference * below,
+            last_price=config.last_price + difference * above,
+            step_size=step_size,
+            total_amount=config.amount * step_size
+        ))
+
+    def resize(self, config: GridConfig) -> GridDiff:
+        return self.apply(config)
+
+    def is_outside(self, price):
+        return price < self.config.first_price or price > self.config.last_price
+
+    def recenter(self, price) -> Optional[GridDiff]:
+        """
+        Shift the band around price when it left the band.
+        The offset is a whole number of levels, so levels that still overlap are kept
+        :return: applied diff or None when price is inside the band
+        """
+        if not self.is_outside(price):
+            return None
+        config = self.config
+        center = (config.first_price + config.last_price) / 2
+        return self.shift(round((price - center) / config.difference) * config.difference)
+
+
+class GridConfigWatcher:
+    """
+    Hot reload of the grid parameters from a JSON file:
+    {"FIRST_PRICE": 36, "LAST_PRICE": 42, "STEP_SIZE": 2, "TOTAL_AMOUNT": 1}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.modified_at = None
+
+    def poll(self) -> Optional[GridConfig]:
+        """
+        :return: new config when the file changed since the last poll, otherwise None
+        """
+        try:
+            modified_at = os.stat(self.path).st_mtime
+        except OSError as e:
+            print(e)
+            return None
+        if modified_at == self.modified_at:
+            return None
+        self.modified_at = modified_at
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return GridConfig(
+                first_price=data["FIRST_PRICE"],
+                last_price=data["LAST_PRICE"],
+                step_size=int(data["STEP_SIZE"]),
+                total_amount=data["TOTAL_AMOUNT"]
+            ).validate()
+        except Exception as e:
+            print(e)
+            return None
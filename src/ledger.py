@@ -0,0 +1,164 @@
+import atexit
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+from src.client import SIDE_BUY
+
+# timestamp ns since epoch, price, qty, fee in second part of pair, side
+FILL = struct.Struct("<qdddb")
+
+
+def fills_path(directory, symbol):
+    """
+    Ex: ledger/NEOUSDT.fills.bin
+    """
+    return os.path.join(directory, "{}.fills.bin".format(symbol))
+
+
+class Position:
+    """
+    Running inventory and PnL of one pair, every fill and every mark is O(1).
+    A sell larger than the inventory opens a short at the fill price.
+    Unrealized PnL is valued at the last market mark, not at the price of the last fill.
+    """
+
+    def __init__(self):
+        self.inventory = 0.0  # in first part of pair, negative when short
+        self.cost = 0.0  # in second part of pair, signed like the inventory
+        self.realized = 0.0
+        self.fees = 0.0
+        self.last_price = None
+        self.peak_equity = 0.0
+
+    @property
+    def average_price(self):
+        return self.cost / self.inventory if self.inventory else 0.0
+
+    @property
+    def unrealized(self):
+        if self.last_price is None:
+            return 0.0
+        return self.inventory * self.last_price - self.cost
+
+    @property
+    def equity(self):
+        """
+        PnL of the pair since the first fill, net of fees
+        """
+        return self.realized + self.unrealized - self.fees
+
+    @property
+    def drawdown(self):
+        """
+        Loss from the best equity reached, in second part of pair
+        """
+        return self.peak_equity - self.equity
+
+    def apply(self, side, price, qty, fee=0.0):
+        signed = qty if side == SIDE_BUY else -qty
+        self.fees += fee
+        if self.inventory and (self.inventory > 0) != (signed > 0):
+            closed = min(abs(signed), abs(self.inventory))
+            if self.inventory < 0:
+                closed = -closed
+            average = self.average_price
+            self.realized += closed * (price - average)
+            self.cost -= closed * average
+            self.inventory -= closed
+            signed += closed
+            if abs(self.inventory) < 1e-12:
+                self.inventory = self.cost = 0.0
+        self.inventory += signed
+        self.cost += signed * price
+        self.update_peak()
+
+    def mark(self, price):
+        """
+        :param price: market price of the pair, fills do not move it
+        """
+        self.last_price = price
+        self.update_peak()
+
+    def update_peak(self):
+        equity = self.equity
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+
+    def __str__(self):
+        return (f"inventory: {self.inventory}, average: {self.average_price:.8f}, "
+                f"realized: {self.realized:.8f}, unrealized: {self.unrealized:.8f}, fees: {self.fees:.8f}, "
+                f"drawdown: {self.drawdown:.8f}")
+
+
+class Ledger:
+    """
+    Positions of every pair, updated per fill instead of being derived from the trade history.
+
+    Fills are appended to one fixed-width binary file per pair (int64 timestamp, float64 price,
+    float64 qty, float64 fee, int8 side) and replayed on start, so the positions survive a restart.
+    Without a directory the ledger is kept in memory only.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.positions: Dict[str, Position] = {}
+        self.files = {}
+        self.lock = threading.Lock()  # the stop loss guard books its sell from its own thread
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.close)
+
+    def position(self, symbol) -> Position:
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = self.load(symbol)
+        return position
+
+    def load(self, symbol) -> Position:
+        position = Position()
+        if self.directory is None:
+            return position
+        path = fills_path(self.directory, symbol)
+        if not os.path.exists(path):
+            return position
+        with open(path, "rb") as f:
+            data = f.read()
+        for _, price, qty, fee, side in FILL.iter_unpack(data[:len(data) - len(data) % FILL.size]):
+            position.apply(side, price, qty, fee)
+        return position
+
+    def record_fill(self, symbol, side, price, qty, fee=0.0, timestamp=None) -> Position:
+        """
+        :param side: SIDE_BUY / SIDE_SELL
+        :param fee: in second part of pair
+        """
+        with self.lock:
+            position = self.position(symbol)
+            position.apply(side, price, qty, fee)
+            if self.directory is not None:
+                f = self.files.get(symbol)
+                if f is None:
+                    f = self.files[symbol] = open(fills_path(self.directory, symbol), "ab")
+                f.write(FILL.pack(time.time_ns() if timestamp is None else timestamp, price, qty, fee, side))
+                f.flush()
+            return position
+
+    def mark(self, symbol, price) -> Position:
+        with self.lock:
+            position = self.position(symbol)
+            position.mark(price)
+            return position
+
+    def drawdown(self, symbol) -> Optional[float]:
+        position = self.positions.get(symbol)
+        return None if position is None else position.drawdown
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
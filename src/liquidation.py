@@ -0,0 +1,219 @@
+import asyncio
+import math
+import threading
+import time
+from decimal import ROUND_FLOOR, Decimal
+from typing import Callable, Optional
+
+from src.client import NO_PRICE, Client, Fill, Ticker
+from src.session import SESSION_POOL
+
+
+class EmergencyLiquidator:
+    """
+    Flattens a pair as fast as possible once the stop is breached:
+    cancel every open order of the pair in bulk, then sell the whole free balance.
+
+    Symbol, asset and order kind are resolved when the liquidator is created.
+    A bulk cancel that fails is retried: the balance its orders lock cannot be sold.
+    """
+
+    def __init__(self, client: Client, paritet, asset, limit_price=None, step_size=None,
+                 cancel_retries=3, retry_delay=0.05, on_fill: Optional[Callable[[Fill], None]] = None):
+        """
+        :param client: Client of the exchange
+        :param paritet: pair in the format of the exchange. Ex: NEOUSDT
+        :param asset: first part of the pair whose balance is sold. Ex: NEO
+        :param limit_price: None for a market sell, otherwise price of a limit sell
+        :param step_size: lot size step of the pair, the sold amount is rounded down to it. None to sell as is
+        :param cancel_retries: bulk cancels sent again while orders of the pair are still open
+        :param retry_delay: in seconds, between two bulk cancels
+        :param on_fill: called with the executed part of the sell, Ex: to book it in the ledger
+        """
+        self.client = client
+        self.paritet = paritet
+        self.asset = asset
+        self.limit_price = limit_price
+        self.step_size = None if step_size is None else Decimal(repr(step_size))
+        self.cancel_retries = cancel_retries
+        self.retry_delay = retry_delay
+        self.on_fill = on_fill
+        self.lock = threading.Lock()
+        self.triggered = False
+        self.breached_at = None
+        self.flat_at = None
+        self.result = None
+
+    def arm(self):
+        """
+        :return: True if the caller owns the liquidation, False if it was already triggered
+        """
+        with self.lock:
+            if self.triggered:
+                return False
+            self.triggered = True
+            self.breached_at = time.perf_counter()
+            return True
+
+    async def liquidate(self):
+        """
+        :return: response of the sell order or None
+        Runs at most once per liquidator, following calls return the first result
+        """
+        if not self.arm():
+            return self.result
+        return await self.flatten()
+
+    async def flatten(self):
+        """
+        Cancel and sell, only called by the owner of the liquidation, see arm()
+        """
+        if not await self.cancel_all():
+            print()
+            print(f"STOP LOSS: orders of {self.paritet} are still open, only the free balance is sold")
+        wallet = await self.client.get_wallet(self.asset)
+        amount = self.round_amount(wallet.available) if wallet is not None else 0.0
+        if amount <= 0:
+            print()
+            print(f"STOP LOSS: nothing to sell on {self.paritet}")
+        elif self.limit_price is None:
+            self.result = await self.client.sell_order_market(self.paritet, amount)
+        else:
+            self.result = await self.client.sell_order_limit(self.paritet, self.limit_price, amount)
+
+        self.flat_at = time.perf_counter()
+        if self.result is None:
+            print()
+            print("Something went wrong while STOP LOSS")
+        elif self.on_fill is not None:
+            fill = self.client.fill_of(self.result, amount, NO_PRICE if self.limit_price is None else self.limit_price)
+            if fill.qty > 0 and not math.isnan(fill.price):
+                self.on_fill(fill)
+        return self.result
+
+    async def cancel_all(self):
+        """
+        :return: True once the pair has no open order
+        """
+        for attempt in range(self.cancel_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_delay)
+            if await self.client.cancel_all(self.paritet) is not None:
+                return True
+            orders = await self.client.get_open_orders(self.paritet)
+            if orders is not None and not orders:  # the bulk cancel failed because nothing was open
+                return True
+        return False
+
+    def round_amount(self, amount):
+        """
+        :return: amount rounded down to the lot size step, an amount off the step is rejected by the exchange
+        """
+        if self.step_size is None:
+            return amount
+        steps = (Decimal(repr(amount)) / self.step_size).to_integral_value(ROUND_FLOOR)
+        return float(steps * self.step_size)
+
+    @property
+    def latency(self):
+        """
+        :return: seconds between breach and sell response, None before liquidation finished
+        """
+        if self.breached_at is None or self.flat_at is None:
+            return None
+        return self.flat_at - self.breached_at
+
+
+class StopLossGuard:
+    """
+    Liquidates on its own thread and event loop, independently of the bot tick loop,
+    as soon as a pushed price falls to the stop.
+
+    The guard sends no price request itself: on_ticker is a listener for MarketDataHub and
+    BitfinexWebsocket, called from the thread of the feed. The liquidation is armed on that
+    thread, so the bot sees it before its next order, and runs on the guard loop.
+    """
+
+    def __init__(self, liquidator: EmergencyLiquidator, stop_price,
+                 on_flat: Optional[Callable[[EmergencyLiquidator], None]] = None):
+        """
+        :param liquidator: EmergencyLiquidator of the pair
+        :param stop_price: in second part of pair, Ex: USD
+        :param on_flat: called from the liquidating thread once the liquidation finished
+        """
+        self.liquidator = liquidator
+        self.stop_price = stop_price
+        self.on_flat = on_flat
+        self.stopped = threading.Event()
+        self.thread = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.done: Optional[asyncio.Event] = None
+
+    def is_breached(self, price):
+        return price <= self.stop_price
+
+    def on_ticker(self, symbol, ticker: Ticker):
+        """
+        Listener for MarketDataHub and BitfinexWebsocket, ignored until the guard loop runs
+        """
+        loop = self.loop
+        if symbol != self.liquidator.paritet or loop is None or not self.is_breached(ticker.last):
+            return
+        if self.liquidator.arm():
+            asyncio.run_coroutine_threadsafe(self.finish(), loop)
+
+    async def check(self, price):
+        """
+        :param price: current price of the pair
+        :return: True if the stop was breached and the pair is liquidated
+        """
+        if not self.is_breached(price):
+            return False
+        return await self.trigger()
+
+    async def trigger(self):
+        """
+        Liquidate now, for stops decided outside the guard. Ex: drawdown of the ledger
+        :return: True once the pair is liquidated
+        """
+        if not self.liquidator.arm():  # already liquidating on another thread, its owner calls on_flat
+            return True
+        await self.finish()
+        return True
+
+    async def finish(self):
+        """
+        Flatten the pair, only called by the owner of the liquidation, see EmergencyLiquidator.arm()
+        """
+        await self.liquidator.flatten()
+        self.stop()
+        if self.on_flat is not None:
+            self.on_flat(self.liquidator)
+
+    async def watch(self):
+        """
+        Keeps the guard loop alive until the pair is flat or the guard is stopped
+        """
+        self.done = asyncio.Event()
+        self.loop = asyncio.get_event_loop()
+        if not self.stopped.is_set():
+            await self.done.wait()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.watch())
+        finally:
+            self.loop = None
+            loop.run_until_complete(SESSION_POOL.close())
+            loop.close()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=f"stop-loss-{self.liquidator.paritet}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        loop = self.loop
+        if loop is not None and self.done is not None:
+            loop.call_soon_threadsafe(self.done.set)
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, List, NamedTuple, Optional
+
+UVLOOP = "uvloop"
+ASYNCIO = "asyncio"
+AUTO = "auto"
+
+
+def install_event_loop(mode=AUTO):
+    """
+    :param mode: "uvloop", "asyncio" or "auto" (uvloop when it is installed)
+    :return: name of the installed loop implementation
+    Must be called before the first asyncio.get_event_loop(). A new loop of the installed
+    implementation is set as the current loop, uvloop's policy does not create one on demand
+    """
+    if mode in (AUTO, UVLOOP):
+        try:
+            import uvloop
+        except ImportError:
+            if mode == UVLOOP:
+                print("uvloop is not installed, falling back to asyncio event loop")
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            return UVLOOP
+    elif mode != ASYNCIO:
+        raise NameError("Unknown event loop mode {}".format(mode))
+
+    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    return ASYNCIO
+
+
+class Stall(NamedTuple):
+    duration: float  # in seconds
+    blocker: str  # coroutine or callback that held the loop
+    stack: str
+
+
+class LoopWatchdog:
+    """
+    Measures scheduling lag of an event loop and reports stalls with the code that blocked it.
+
+    A heartbeat callback reschedules itself on the loop every `interval` seconds.
+    A monitor thread checks the last heartbeat, and when the loop is running but has not beaten
+    for `threshold` seconds, samples the stack of the loop thread to name the blocker.
+    Time while the loop is not running (between run_until_complete calls) is not counted.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, threshold=0.1, interval=0.02,
+                 on_stall: Optional[Callable[[Stall], None]] = None):
+        """
+        :param loop: watched loop, default: asyncio.get_event_loop()
+        :param threshold: in seconds, lag reported as a stall
+        :param interval: in seconds, time between two heartbeats
+        :param on_stall: called from the monitor thread, default prints the stall
+        """
+        self.loop = loop or asyncio.get_event_loop()
+        self.threshold = threshold
+        self.interval = interval
+        self.on_stall = on_stall or self.print_stall
+        self.max_lag = 0.0
+        self.stalls: List[Stall] = []
+        self.last_beat = time.perf_counter()
+        self.last_idle = self.last_beat
+        self.loop_thread_id = None
+        self.reported = False
+        self.stopped = threading.Event()
+        self.handle = None
+        self.thread = None
+
+    def beat(self):
+        now = time.perf_counter()
+        expected = max(self.last_beat + self.interval, self.last_idle)
+        self.max_lag = max(self.max_lag, now - expected)
+        self.last_beat = now
+        self.loop_thread_id = threading.get_ident()
+        self.reported = False
+        if not self.stopped.is_set():
+            self.handle = self.loop.call_later(self.interval, self.beat)
+
+    def blocker(self):
+        """
+        :return: (name, stack) of what the loop thread is executing right now
+        """
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return "unknown", ""
+        stack = traceback.extract_stack(frame)
+        task = asyncio.current_task(self.loop)
+        if task is not None:
+            coroutine = task.get_coro()
+            name = getattr(coroutine, "__qualname__", repr(coroutine))
+        else:
+            name = "callback"
+        last = stack[-1]
+        return "{} at {} ({}:{})".format(name, last.name, last.filename, last.lineno), "".join(stack.format())
+
+    def check(self):
+        now = time.perf_counter()
+        if not self.loop.is_running():
+            self.last_idle = now
+            return
+        lag = now - max(self.last_beat + self.interval, self.last_idle)
+        if lag < self.threshold or self.reported:
+            return
+        self.reported = True
+        name, stack = self.blocker()
+        stall = Stall(duration=lag, blocker=name, stack=stack)
+        self.stalls.append(stall)
+        self.on_stall(stall)
+
+    def monitor(self):
+        while not self.stopped.wait(self.interval / 2):
+            self.check()
+
+    @staticmethod
+    def print_stall(stall: Stall):
+        print()
+        print(f"Event loop blocked for at least {stall.duration * 1000:.0f} ms by {stall.blocker}")
+
+    def start(self):
+        self.last_beat = self.last_idle = time.perf_counter()
+        self.loop.call_soon_threadsafe(self.beat)
+        self.thread = threading.Thread(target=self.monitor, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.handle is not None:
+            self.loop.call_soon_threadsafe(self.handle.cancel)
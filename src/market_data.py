@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from src.client import Client, Ticker
+
+
+class MarketDataHub:
+    """
+    Shares one all-symbols ticker request per exchange between every bot trading on it.
+
+    Bots subscribe their paritet and ask the hub for a ticker instead of the client.
+    The hub makes at most one bulk request per `interval` seconds, decodes only subscribed
+    symbols and lets concurrent callers await the request that is already in flight.
+    """
+
+    def __init__(self, client: Client, interval=1.0):
+        """
+        :param client: Client of the exchange, must implement get_tickers
+        :param interval: in seconds, minimal time between two bulk requests
+        """
+        self.client = client
+        self.interval = interval
+        self.symbols: Set[str] = set()
+        self.tickers: Dict[str, Ticker] = {}
+        self.updated_at = None
+        self._requested: Set[str] = set()
+        self._in_flight: Optional[asyncio.Future] = None
+        self.listeners: List[Callable[[str, Ticker], None]] = []
+
+    def subscribe(self, symbol):
+        self.symbols.add(symbol)
+
+    def add_listener(self, listener: Callable[[str, Ticker], None]):
+        """
+        :param listener: called with (symbol, ticker) for every ticker of every bulk request
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, symbol):
+        self.symbols.discard(symbol)
+        self.tickers.pop(symbol, None)
+
+    def is_stale(self, symbol):
+        if self.updated_at is None:
+            return True
+        if symbol not in self._requested:
+            return True
+        return time.monotonic() - self.updated_at >= self.interval
+
+    async def get_ticker(self, symbol) -> Optional[Ticker]:
+        """
+        :param symbol: paritet in the format of the exchange
+        :return: Ticker or None if the exchange did not return it
+        """
+        self.subscribe(symbol)
+        if self.is_stale(symbol):
+            await self.refresh()
+            if symbol not in self._requested:  # subscribed while another request was in flight
+                await self.refresh()
+        if self.is_stale(symbol):
+            return None
+        return self.tickers.get(symbol)
+
+    async def refresh(self):
+        """
+        Fetch tickers for every subscribed symbol.
+        If a request is already in flight, wait for it instead of sending a new one
+        """
+        if self._in_flight is None or self._in_flight.done():
+            self._in_flight = asyncio.ensure_future(self._fetch())
+        await asyncio.shield(self._in_flight)
+
+    async def _fetch(self):
+        """
+        The live symbol set is passed to the client: bulk endpoints return every symbol,
+        so symbols subscribed while the request is in flight are decoded from the same response
+        """
+        requested = frozenset(self.symbols)
+        tickers = await self.client.get_tickers(self.symbols)
+        if tickers is None:
+            return
+        self.tickers.update(tickers)
+        for listener in self.listeners:
+            for symbol, ticker in tickers.items():
+                listener(symbol, ticker)
+        self._requested = set(requested).union(tickers)
+        self.updated_at = time.monotonic()
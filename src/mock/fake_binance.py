@@ -0,0 +1,253 @@
+import asyncio
+import itertools
+import json
+import socket
+import time
+from typing import Dict, List
+
+from aiohttp import web
+
+
+class FakeBinance:
+    """
+    Local in-memory exchange speaking the subset of the Binance REST API used by BinanceClient.
+    Signatures are not checked. Every response is delayed by `latency` seconds
+    to emulate the network round trip.
+
+    Usage:
+        exchange = FakeBinance(prices={"NEOUSDT": 40.0}, balances={"NEO": 1.0, "USDT": 100.0})
+        await exchange.start()
+        client = BinanceClient("key", "secret", host=exchange.host)
+    """
+
+    def __init__(self, prices: Dict[str, float], balances: Dict[str, float], latency=0.0, port=0):
+        self.prices = dict(prices)
+        self.free = dict(balances)
+        self.locked = {asset: 0.0 for asset in balances}
+        self.latency = latency
+        self.port = port
+        self.open_orders: Dict[int, dict] = {}
+        self.orders: Dict[int, dict] = {}  # every order, open or closed
+        self.fills: List[dict] = []
+        self.order_ids = itertools.count(1)
+        self.runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/api/v3/ticker/price', self.ticker_price)
+        self.app.router.add_get('/api/v3/depth', self.depth)
+        self.app.router.add_get('/api/v3/account', self.account)
+        self.app.router.add_get('/api/v3/openOrders', self.get_open_orders)
+        self.app.router.add_delete('/api/v3/openOrders', self.cancel_open_orders)
+        self.app.router.add_get('/api/v3/order', self.query_order)
+        self.app.router.add_post('/api/v3/order', self.new_order)
+        self.app.router.add_delete('/api/v3/order', self.cancel_order)
+        self.app.router.add_post('/api/v3/order/cancelReplace', self.cancel_replace)
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        if self.port == 0:
+            with socket.socket() as sock:
+                sock.bind(('127.0.0.1', 0))
+                self.port = sock.getsockname()[1]
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', self.port).start()
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @staticmethod
+    def split_symbol(symbol):
+        for quote in ("USDT", "BUSD", "BTC", "ETH", "BNB"):
+            if symbol.endswith(quote) and symbol != quote:
+                return symbol[:-len(quote)], quote
+        raise web.HTTPBadRequest(text='{"code":-1121,"msg":"Invalid symbol."}')
+
+    async def delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def ticker_price(self, request):
+        await self.delay()
+        symbol = request.query.get("symbol")
+        if symbol:
+            return web.json_response({"symbol": symbol, "price": "{:.8f}".format(self.prices[symbol])})
+        return web.json_response([
+            {"symbol": symbol, "price": "{:.8f}".format(price)} for symbol, price in self.prices.items()
+        ])
+
+    async def depth(self, request):
+        """
+        Five levels a cent apart on each side of the price
+        """
+        await self.delay()
+        price = self.prices[request.query["symbol"]]
+        return web.json_response({
+            "lastUpdateId": 1,
+            "bids": [["{:.8f}".format(price - 0.01 * i), "1.00000000"] for i in range(1, 6)],
+            "asks": [["{:.8f}".format(price + 0.01 * i), "1.00000000"] for i in range(1, 6)],
+        })
+
+    async def account(self, request):
+        await self.delay()
+        return web.json_response({"balances": [
+            {"asset": asset, "free": "{:.8f}".format(self.free[asset]), "locked": "{:.8f}".format(self.locked[asset])}
+            for asset in self.free
+        ]})
+
+    def order_json(self, order):
+        return {
+            "symbol": order["symbol"],
+            "orderId": order["orderId"],
+            "price": "{:.8f}".format(order["price"]),
+            "origQty": "{:.8f}".format(order["quantity"]),
+            "executedQty": "{:.8f}".format(order["executed"]),
+            "cummulativeQuoteQty": "{:.8f}".format(order["quote"]),
+            "status": order["status"],
+            "timeInForce": "GTC",
+            "type": order["type"],
+            "side": order["side"],
+        }
+
+    async def get_open_orders(self, request):
+        await self.delay()
+        symbol = request.query.get("symbol")
+        return web.json_response([
+            self.order_json(order) for order in self.open_orders.values() if order["symbol"] == symbol
+        ])
+
+    def release(self, order):
+        """
+        Unlock the part of the order that did not execute
+        """
+        base, quote = self.split_symbol(order["symbol"])
+        left = order["quantity"] - order["executed"]
+        if order["side"] == "SELL":
+            self.locked[base] -= left
+            self.free[base] += left
+        else:
+            self.locked[quote] -= left * order["price"]
+            self.free[quote] += left * order["price"]
+
+    def execute(self, order_id, quantity):
+        """
+        A counterparty trades up to `quantity` against a resting order, at the order price
+        """
+        order = self.open_orders[order_id]
+        quantity = min(quantity, order["quantity"] - order["executed"])
+        base, quote = self.split_symbol(order["symbol"])
+        if order["side"] == "SELL":
+            self.locked[base] -= quantity
+            self.free[quote] += quantity * order["price"]
+        else:
+            self.locked[quote] -= quantity * order["price"]
+            self.free[base] += quantity
+        order["executed"] += quantity
+        order["quote"] += quantity * order["price"]
+        self.fills.append(dict(order, quantity=quantity, time=time.perf_counter()))
+        if order["quantity"] - order["executed"] > 1e-12:
+            order["status"] = "PARTIALLY_FILLED"
+        else:
+            order["status"] = "FILLED"
+            del self.open_orders[order_id]
+
+    async def cancel_open_orders(self, request):
+        await self.delay()
+        symbol = request.query.get("symbol")
+        canceled = [order for order in self.open_orders.values() if order["symbol"] == symbol]
+        if not canceled:
+            raise web.HTTPBadRequest(text='{"code":-2011,"msg":"Unknown order sent."}')
+        for order in canceled:
+            del self.open_orders[order["orderId"]]
+            self.release(order)
+            order["status"] = "CANCELED"
+        return web.json_response([self.order_json(order) for order in canceled])
+
+    def cancel(self, symbol, order_id):
+        order = self.open_orders.get(order_id)
+        if order is None or order["symbol"] != symbol:
+            raise web.HTTPBadRequest(text='{"code":-2011,"msg":"Unknown order sent."}')
+        del self.open_orders[order_id]
+        self.release(order)
+        order["status"] = "CANCELED"
+        return self.order_json(order)
+
+    async def cancel_order(self, request):
+        await self.delay()
+        return web.json_response(self.cancel(request.query["symbol"], int(request.query["orderId"])))
+
+    async def cancel_replace(self, request):
+        await self.delay()
+        canceled = self.cancel(request.query["symbol"], int(request.query["cancelOrderId"]))
+        try:
+            created = self.place(request.query)
+        except web.HTTPBadRequest as e:
+            return web.json_response({"code": -2021, "msg": "Order cancel-replace partially failed.", "data": {
+                "cancelResult": "SUCCESS",
+                "newOrderResult": "FAILURE",
+                "cancelResponse": canceled,
+                "newOrderResponse": json.loads(e.text)
+            }}, status=409)
+        return web.json_response({
+            "cancelResult": "SUCCESS",
+            "newOrderResult": "SUCCESS",
+            "cancelResponse": canceled,
+            "newOrderResponse": created
+        })
+
+    async def query_order(self, request):
+        await self.delay()
+        order = self.orders.get(int(request.query["orderId"]))
+        if order is None or order["symbol"] != request.query["symbol"]:
+            raise web.HTTPBadRequest(text='{"code":-2013,"msg":"Order does not exist."}')
+        return web.json_response(self.order_json(order))
+
+    async def new_order(self, request):
+        await self.delay()
+        return web.json_response(self.place(request.query))
+
+    def place(self, query):
+        symbol = query["symbol"]
+        side = query["side"]
+        quantity = float(query["quantity"])
+        base, quote = self.split_symbol(symbol)
+        order = {"symbol": symbol, "orderId": next(self.order_ids), "side": side, "quantity": quantity,
+                 "type": query["type"], "price": float(query.get("price", 0.0)), "executed": 0.0, "quote": 0.0,
+                 "status": "NEW"}
+
+        market_price = self.prices[symbol]
+        marketable = query["type"] == "MARKET" or \
+            side == "BUY" and float(query["price"]) >= market_price or \
+            side == "SELL" and float(query["price"]) <= market_price
+        if marketable:  # filled at the market price, like a taker order
+            price = market_price
+            if side == "SELL" and self.free[base] + 1e-12 < quantity or \
+                    side == "BUY" and self.free[quote] + 1e-12 < quantity * price:
+                raise web.HTTPBadRequest(
+                    text='{"code":-2010,"msg":"Account has insufficient balance for requested action."}'
+                )
+            sign = -1 if side == "SELL" else 1
+            self.free[base] += sign * quantity
+            self.free[quote] -= sign * quantity * price
+            order.update(executed=quantity, quote=quantity * price, status="FILLED")
+            self.orders[order["orderId"]] = order
+            self.fills.append(dict(order, price=price, time=time.perf_counter()))
+            return self.order_json(order)
+
+        price = order["price"]
+        if side == "SELL":
+            if self.free[base] + 1e-12 < quantity:
+                raise web.HTTPBadRequest(
+                    text='{"code":-2010,"msg":"Account has insufficient balance for requested action."}'
+                )
+            self.free[base] -= quantity
+            self.locked[base] += quantity
+        else:
+            self.free[quote] -= quantity * price
+            self.locked[quote] += quantity * price
+        self.open_orders[order["orderId"]] = order
+        self.orders[order["orderId"]] = order
+        return self.order_json(order)
@@ -1,16 +1,22 @@
 import asyncio
 
-from src.client import Client, Wallet, Ticker
+from src.client import Client, Fill, Wallet, Ticker
 
 
 class MockClient(Client):
 
 
     async def get_ticker(self, paritet) -> Ticker:
-        return Ticker("5", "6", "7.8")
+        return Ticker(5.0, 6.0, 7.8)
+
+    async def get_tickers(self, symbols):
+        return {symbol: Ticker(5.0, 6.0, 7.8) for symbol in symbols}
+
+    async def order_book(self, paritet):
+        return {"bids": [[5.0, 1.0]], "asks": [[6.0, 1.0]]}
 
     async def get_wallet(self, paritet) -> Wallet:
-        return Wallet("10")
+        return Wallet(10.0)
 
     async def buy_order_market(self, paritet, amount):
         await asyncio.sleep(5)
@@ -39,3 +45,26 @@ class MockClient(Client):
             return None
         else:
             return True
+
+    async def cancel_all(self, symbol):
+        await asyncio.sleep(1)
+        return []
+
+    async def cancel_order(self, symbol, order_id):
+        await asyncio.sleep(1)
+        return True
+
+    async def get_order(self, symbol, order_id):
+        await asyncio.sleep(1)
+        return True
+
+    @staticmethod
+    def order_id_of(order):
+        return 0
+
+    @staticmethod
+    def fill_of(order, amount, price) -> Fill:
+        """
+        Accepted orders fill completely at their price
+        """
+        return Fill(qty=amount, quote=amount * price)
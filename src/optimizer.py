@@ -0,0 +1,195 @@
+"""
+Grid parameter optimizer over historical candles.
+
+    python -m src.optimizer candles.csv --first-price 30:38:0.5 --last-price 40:48:0.5 --step-size 2:20 \
+        --total-amount 1 --fee 0.001 --top 20
+
+candles.csv holds one candle per line: open_time, open, high, low, close[, ...] (Binance kline export).
+A header line is skipped. The close of every candle stands in for the ticker.last the bot polls.
+
+Every configuration is simulated with the ping-pong rules of create_table and PingPongBot.execute:
+a level waiting in the buy table is bought when its buy price >= price,
+a bought level is sold when its sell price <= price, orders fill at the price of the tick.
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+COLUMNS = ("first_price", "last_price", "step_size", "total_amount",
+           "pnl", "turnover", "trades", "max_drawdown", "inventory")
+
+_prices = None
+
+
+def load_candles(path):
+    """
+    :param path: csv file of candles
+    :return: float64 array of (open_time, open, high, low, close)
+    """
+    with open(path) as f:
+        first = f.readline()
+    skip = 0 if first.split(",")[0].strip().replace(".", "", 1).isdigit() else 1
+    return np.loadtxt(path, delimiter=",", skiprows=skip, usecols=(0, 1, 2, 3, 4), ndmin=2)
+
+
+def share_prices(candles, directory):
+    """
+    Write close prices once into a .npy file that every worker memory-maps
+    :return: path of the file
+    """
+    path = os.path.join(directory, "close.npy")
+    np.save(path, np.ascontiguousarray(candles[:, 4]))
+    return path
+
+
+def init_worker(path):
+    global _prices
+    _prices = np.load(path, mmap_mode="r")
+
+
+def parse_range(value, cast=float):
+    """
+    "36" -> [36], "30:38:0.5" -> [30, 30.5, ..., 38], "2:20" -> [2, 3, ..., 20]
+    """
+    parts = [cast(part) for part in value.split(":")]
+    if len(parts) == 1:
+        return parts
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) == 3 else cast(1)
+    return [cast(round(float(v), 10)) for v in np.arange(start, stop + step / 2, step)]
+
+
+def build_configs(first_prices, last_prices, step_sizes, total_amounts):
+    """
+    :return: array of (first_price, last_price, step_size, total_amount) with first_price < last_price
+    """
+    configs = [config for config in itertools.product(first_prices, last_prices, step_sizes, total_amounts)
+               if config[0] < config[1]]
+    return np.array(configs, dtype=np.float64).reshape(-1, 4)
+
+
+def build_levels(configs):
+    """
+    Vectorized create_table for many configurations, padded to the biggest step size
+    :return: buy, sell, amount arrays of shape (configs, levels)
+    """
+    first, last, steps, total = configs.T
+    levels = np.arange(int(steps.max()))
+    difference = ((last - first) / steps)[:, None]
+    buy = first[:, None] + difference * levels
+    sell = buy + difference
+    valid = levels < steps[:, None]
+    amount = np.where(valid, (total / steps)[:, None], 0.0)
+    return buy, sell, amount, valid
+
+
+def simulate(configs, prices, fee=0.0):
+    """
+    :param configs: array of (first_price, last_price, step_size, total_amount)
+    :param prices: close price of every tick
+    :param fee: fraction of notional paid on every fill
+    :return: array of (pnl, turnover, trades, max_drawdown, inventory) per configuration
+    """
+    buy, sell, amount, valid = build_levels(configs)
+    count = len(configs)
+    holding = np.zeros(buy.shape, dtype=bool)
+    cash = np.zeros(count)
+    inventory = np.zeros(count)
+    turnover = np.zeros(count)
+    trades = np.zeros(count)
+    peak = np.zeros(count)
+    max_drawdown = np.zeros(count)
+
+    previous = None
+    for price in prices.tolist():
+        if price != previous:
+            to_buy = (buy >= price) & ~holding & valid
+            to_sell = (sell <= price) & holding
+            changed = to_buy | to_sell
+            if changed.any():
+                bought = (amount * to_buy).sum(axis=1)
+                sold = (amount * to_sell).sum(axis=1)
+                notional = (bought + sold) * price
+                cash += (sold - bought) * price - notional * fee
+                inventory += bought - sold
+                turnover += notional
+                trades += changed.sum(axis=1)
+                holding ^= changed
+            previous = price
+
+            equity = cash + inventory * price
+            np.maximum(peak, equity, out=peak)
+            np.maximum(max_drawdown, peak - equity, out=max_drawdown)
+
+    pnl = cash + inventory * float(prices[-1])
+    return np.column_stack((pnl, turnover, trades, max_drawdown, inventory))
+
+
+def simulate_chunk(configs, fee):
+    return simulate(configs, _prices, fee)
+
+
+def optimize(candles, configs, fee=0.0, workers=None, chunk_size=256):
+    """
+    :return: array of rows ordered like COLUMNS, ranked by pnl
+    """
+    if len(configs) == 0:
+        return np.empty((0, len(COLUMNS)))
+    order = np.argsort(configs[:, 2], kind="stable")  # similar step sizes pad less
+    configs = configs[order]
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = share_prices(candles, directory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path,)) as pool:
+            results = list(pool.map(simulate_chunk, chunks, itertools.repeat(fee)))
+
+    table = np.hstack((configs, np.vstack(results)))
+    return table[np.argsort(-table[:, 4], kind="stable")]
+
+
+def print_table(table, top):
+    print("{:>11} {:>10} {:>9} {:>12} {:>12} {:>12} {:>7} {:>12} {:>10}".format(*COLUMNS))
+    for row in table[:top]:
+        print("{:>11.4f} {:>10.4f} {:>9d} {:>12.4f} {:>12.4f} {:>12.2f} {:>7d} {:>12.4f} {:>10.4f}".format(
+            row[0], row[1], int(row[2]), row[3], row[4], row[5], int(row[6]), row[7], row[8]
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("candles", help="csv file of candles")
+    parser.add_argument("--first-price", required=True, help="FIRST_PRICE, value or start:stop:step")
+    parser.add_argument("--last-price", required=True, help="LAST_PRICE, value or start:stop:step")
+    parser.add_argument("--step-size", required=True, help="STEP_SIZE, value or start:stop[:step]")
+    parser.add_argument("--total-amount", default="1", help="TOTAL_AMOUNT, value or start:stop:step")
+    parser.add_argument("--fee", type=float, default=0.0, help="fee per fill, Ex: 0.001 for 0.1%%")
+    parser.add_argument("--workers", type=int, default=None, help="processes, default: cpu count")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    parser.add_argument("--csv", help="write the whole ranked table to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    candles = load_candles(args.candles)
+    configs = build_configs(
+        parse_range(args.first_price),
+        parse_range(args.last_price),
+        parse_range(args.step_size, int),
+        parse_range(args.total_amount)
+    )
+    table = optimize(candles, configs, fee=args.fee, workers=args.workers)
+
+    print(f"{len(configs)} configurations over {len(candles)} candles "
+          f"in {time.perf_counter() - started:.1f}s")
+    print_table(table, args.top)
+    if args.csv:
+        np.savetxt(args.csv, table, delimiter=",", header=",".join(COLUMNS), comments="", fmt="%.8g")
+
+
+if __name__ == '__main__':
+    main()
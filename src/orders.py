@@ -0,0 +1,82 @@
+from typing import List
+
+from src.client import Client, Fill
+from src.grid import LocalOrder
+
+
+class CoalescedOrder:
+    """
+    One exchange order standing for several grid levels of the same side.
+    Every level is marketable at the current price, so one order at the least aggressive
+    level price fills them all.
+    """
+
+    def __init__(self, rows: List[LocalOrder], price):
+        """
+        :param rows: levels in fill priority, the order fill is split across them in this order
+        :param price: limit price of the order
+        """
+        self.rows = rows
+        self.price = price
+        self.amount = sum(row.remaining for row in rows)
+
+    def split(self, filled=None) -> List[LocalOrder]:
+        """
+        :param filled: amount filled by the exchange, None for the whole order
+        :return: levels completely covered by the fill, ready for their other side.
+            The rest of the fill is carried onto the next level, see LocalOrder.filled
+        """
+        remaining = self.amount if filled is None else filled
+        covered = []
+        for row in self.rows:
+            if remaining + 1e-12 < row.remaining:
+                if remaining > 1e-12:
+                    row.filled += remaining
+                break
+            remaining -= row.remaining
+            row.filled = 0.0
+            covered.append(row)
+        return covered
+
+
+def coalesce_buy_rows(rows: List[LocalOrder], enabled=True) -> List[CoalescedOrder]:
+    """
+    Highest levels were triggered first and get the fill first
+    """
+    if not enabled or len(rows) < 2:
+        return [CoalescedOrder([row], row.buy) for row in rows]
+    rows = sorted(rows, key=lambda row: row.buy, reverse=True)
+    return [CoalescedOrder(rows, price=rows[-1].buy)]
+
+
+def coalesce_sell_rows(rows: List[LocalOrder], enabled=True) -> List[CoalescedOrder]:
+    """
+    Lowest levels were triggered first and get the fill first
+    """
+    if not enabled or len(rows) < 2:
+        return [CoalescedOrder([row], row.sell) for row in rows]
+    rows = sorted(rows, key=lambda row: row.sell)
+    return [CoalescedOrder(rows, price=rows[-1].sell)]
+
+
+async def settle(client: Client, paritet, order: CoalescedOrder, response) -> Fill:
+    """
+    :param response: response of the new order, None when it was rejected
+    :return: executed part of the order, an unfilled remainder is canceled so its levels can trigger again
+    """
+    if response is None:
+        return Fill(qty=0.0, quote=0.0)
+    fill = client.fill_of(response, order.amount, order.price)
+    if fill.qty + 1e-12 >= order.amount:
+        return fill
+    order_id = client.order_id_of(response)
+    canceled = await client.cancel_order(paritet, order_id)
+    if canceled is not None:
+        return client.fill_of(canceled, order.amount, order.price)
+    # filled before the cancel, or the cancel itself failed: only the order status tells what executed
+    status = await client.get_order(paritet, order_id)
+    if status is None:
+        print()
+        print(f"{paritet} order {order_id}: cancel and status failed, only the fill of its response is booked")
+        return fill
+    return client.fill_of(status, order.amount, order.price)
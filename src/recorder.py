@@ -0,0 +1,172 @@
+import array
+import atexit
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from src.client import SIDE_BUY, SIDE_NONE, SIDE_SELL, Ticker
+
+TICKER = "ticker"
+ORDER = "order"  # orders sent by the bot
+TRADE = "trade"  # trades of the exchange
+DEPTH = "depth"
+
+# column name, array.array typecode, numpy dtype
+COLUMNS = (
+    ("timestamp", "q", np.int64),  # ns since epoch
+    ("price", "d", np.float64),
+    ("qty", "d", np.float64),
+    ("side", "b", np.int8),
+)
+
+
+class Ticks(NamedTuple):
+    timestamp: np.ndarray
+    price: np.ndarray
+    qty: np.ndarray
+    side: np.ndarray
+
+
+def column_path(directory, symbol, kind, column):
+    """
+    Ex: records/NEOUSDT/ticker.price.bin
+    """
+    return os.path.join(directory, symbol, "{}.{}.bin".format(kind, column))
+
+
+class ColumnBuffer:
+    """
+    Rows of one (symbol, kind) stream, buffered in typed arrays and appended to one file per column
+    """
+
+    def __init__(self, directory, symbol, kind):
+        os.makedirs(os.path.join(directory, symbol), exist_ok=True)
+        self.columns = [array.array(typecode) for _, typecode, _ in COLUMNS]
+        self.files = [open(column_path(directory, symbol, kind, name), "ab") for name, _, _ in COLUMNS]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def append(self, timestamp, price, qty, side):
+        timestamps, prices, quantities, sides = self.columns
+        timestamps.append(timestamp)
+        prices.append(price)
+        quantities.append(qty)
+        sides.append(side)
+
+    def flush(self):
+        if not len(self):
+            return
+        for column, f in zip(self.columns, self.files):
+            column.tofile(f)
+            f.flush()
+            del column[:]
+
+    def close(self):
+        self.flush()
+        for f in self.files:
+            f.close()
+
+
+class TickRecorder:
+    """
+    Appends ticker, order, trade and depth updates to fixed-width binary columnar files:
+    one file per (symbol, kind, column) with int64 timestamp, float64 price, float64 qty, int8 side.
+
+    The bot records tickers from the market data hub, its own orders and one depth snapshot
+    per tick from Client.order_book. Exchange trades come from push feeds, on Bitfinex the
+    trades channel of BitfinexWebsocket; the other exchanges have no trade feed in the tree.
+
+    Rows are kept in memory and written with one write per column every `batch_size` rows,
+    so a record call on the live loop is a few array appends. Feeds call it from their own
+    thread, a lock keeps the columns of a row together.
+    """
+
+    def __init__(self, directory, batch_size=4096):
+        """
+        :param directory: root folder of the records
+        :param batch_size: rows buffered per stream before they are written
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.streams: Dict[Tuple[str, str], ColumnBuffer] = {}
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def stream(self, symbol, kind) -> ColumnBuffer:
+        key = (symbol, kind)
+        buffer = self.streams.get(key)
+        if buffer is None:
+            buffer = self.streams[key] = ColumnBuffer(self.directory, symbol, kind)
+        return buffer
+
+    def record(self, symbol, kind, price, qty=0.0, side=SIDE_NONE, timestamp=None):
+        with self.lock:
+            buffer = self.stream(symbol, kind)
+            buffer.append(time.time_ns() if timestamp is None else timestamp, float(price), float(qty), side)
+            if len(buffer) >= self.batch_size:
+                buffer.flush()
+
+    def record_ticker(self, symbol, ticker: Ticker):
+        """
+        Listener for MarketDataHub and BitfinexWebsocket
+        """
+        self.record(symbol, TICKER, ticker.last)
+
+    def record_order(self, symbol, price, qty, side):
+        self.record(symbol, ORDER, price, qty, side)
+
+    def record_trade(self, symbol, price, qty, side, timestamp=None):
+        """
+        Listener for BitfinexWebsocket.subscribe_trades
+        """
+        self.record(symbol, TRADE, price, qty, side, timestamp)
+
+    def record_depth(self, symbol, bids, asks):
+        """
+        :param bids: [[price, qty], ...]
+        :param asks: [[price, qty], ...]
+        Every level of the snapshot gets the same timestamp
+        """
+        timestamp = time.time_ns()
+        for price, qty, *_ in bids:
+            self.record(symbol, DEPTH, price, qty, SIDE_BUY, timestamp)
+        for price, qty, *_ in asks:
+            self.record(symbol, DEPTH, price, qty, SIDE_SELL, timestamp)
+
+    def flush(self):
+        with self.lock:
+            for buffer in self.streams.values():
+                buffer.flush()
+
+    def close(self):
+        with self.lock:
+            for buffer in self.streams.values():
+                buffer.close()
+            self.streams = {}
+
+
+class TickReader:
+    """
+    Memory-maps files written by TickRecorder. Columns are returned as numpy views on the files,
+    nothing is copied until the data is used.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def symbols(self):
+        return sorted(entry for entry in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, entry)))
+
+    def read(self, symbol, kind=TICKER) -> Ticks:
+        paths = [column_path(self.directory, symbol, kind, name) for name, _, _ in COLUMNS]
+        rows = min(os.path.getsize(path) // np.dtype(dtype).itemsize
+                   for path, (_, _, dtype) in zip(paths, COLUMNS))
+        if rows == 0:
+            return Ticks(*[np.empty(0, dtype=dtype) for _, _, dtype in COLUMNS])
+        return Ticks(*[np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+                       for path, (_, _, dtype) in zip(paths, COLUMNS)])
@@ -2,12 +2,23 @@ import asyncio
 import enum
 import time
 import schedule
-from typing import List
+from typing import Callable, Dict, List, Optional
 
 from src.binance.rest import BinanceClient
 from src.bitfinex.rest import BfxClientWrapper
-from src.client import Client
+from src.bitfinex.transport import BitfinexWebsocket
+from src.client import SIDE_BUY, SIDE_SELL, Client, Fill
+from src.credentials import Credential, CredentialPool, load_credentials
+from src.grid import GridConfig, GridConfigWatcher, GridManager, LocalOrder
+from src.ledger import Ledger
+from src.liquidation import EmergencyLiquidator, StopLossGuard
+from src.loop import AUTO, LoopWatchdog, install_event_loop
+from src.market_data import MarketDataHub
 from src.mock.mock_rest import MockClient
+from src.orders import coalesce_buy_rows, coalesce_sell_rows, settle
+from src.recorder import TickRecorder
+from src.sync_bridge import BRIDGE
+from src.tracing import PROFILER, TRACER
 from src.whitebit.rest import WhiteBitClient
 
 
@@ -23,14 +34,6 @@ class OrderType(enum.Enum):
     LIMIT = "Limit"
 
 
-BINANCE_API_KEY = "yeMW6p7ZxOjRTg1CORTWHQ4LneI8r2VU5CICPtLg48oquRfYLL1JW3GeR3t6wQ0S"
-BINANCE_API_SECRET = "Qpxj0wtnSbUWrUQbAGzwgNunn5icPnHlB63u7P5yD3PTdPxGjUjdzBp438cwSkAH"
-BITFINEX_API_KEY = "L3tAktqOf7YxQ1zVoxlqjUk0PztTREj5tfiqdzoIMoR"
-BITFINEX_API_SECRET = "hyp4Txyt3IVsaGx5zGqegoeL1pZV6Uh65VCEMvOe1Lk"
-WHITEBIT_API_KEY = "a6b88c85d2e229b6bd80b089e8f57245"
-WHITEBIT_API_SECRET = "0ae248a4132d384f0c379d2ef503cc09"
-
-
 STOCK = Stock.BINANCE
 CURRENCY_PAIR_FIRST = "NEO"
 CURRENCY_PAIR_SECOND = "USDT"
@@ -41,34 +44,107 @@ STEP_SIZE = 2
 IS_STOP_LOSS_NEEDED = False
 STOP_LOSS_TYPE = OrderType.LIMIT  # Market / Limit
 STOP_LOSS_PRICE = 5  # in Second part of pair, Ex: USD
+STOP_LOSS_STEP_SIZE = 0.001  # in First part of pair, lot size step of the pair, the stop loss sell is rounded down to it
 TIME_DURATION = 5  # in seconds
+MARKET_DATA_INTERVAL = 1  # in seconds, one all-symbols ticker request per exchange per interval
+RECORD_DIR = None  # folder for tick files to replay, None to disable recording
+EVENT_LOOP_MODE = AUTO  # auto / uvloop / asyncio
+LOOP_STALL_THRESHOLD = 0.1  # in seconds, report event loop stalls longer than it. None to disable
+COALESCE_ORDERS = True  # merge levels triggered on the same side in one tick into one order
+AUTO_RECENTER = False  # shift the grid around the price once the price leaves FIRST_PRICE..LAST_PRICE
+GRID_CONFIG_PATH = None  # json file with FIRST_PRICE, LAST_PRICE, STEP_SIZE, TOTAL_AMOUNT, reloaded on change
+TRACE_PATH = "trace.json"  # kill -USR2 <pid> writes the spans of the last tick here as Chrome trace JSON
+PROFILE_DIR = "."  # kill -USR1 <pid> profiles the bot for PROFILE_SECONDS and writes the profile here
+PROFILE_SECONDS = 30
+CREDENTIALS_PATH = None  # json file of sub-account keys, None to read <STOCK>_API_KEY[_<NAME>] / <STOCK>_API_SECRET[_<NAME>] env vars
+KEY_RATE_LIMIT = 50  # max requests per key in KEY_RATE_WINDOW, requests wait for headroom above it
+KEY_RATE_WINDOW = 10  # in seconds
+LEDGER_DIR = None  # folder of the fill ledger replayed on start, None to keep positions in memory only
+FEE_RATE = 0.001  # fee of a fill, share of its executed value in Second part of pair
+MAX_DRAWDOWN = None  # in Second part of pair, liquidate once equity falls this much from its peak. None to disable
 
 
 """ Variables created dynamically """
 DIFFERENCE = float(LAST_PRICE - FIRST_PRICE) / STEP_SIZE
 AMOUNT = float(TOTAL_AMOUNT) / STEP_SIZE
 END_SESSION = False
+EVENT_LOOP = install_event_loop(EVENT_LOOP_MODE)
+MARKET_DATA_HUBS: Dict[Stock, MarketDataHub] = {}
+CREDENTIAL_POOLS: Dict[Stock, CredentialPool] = {}
+WEBSOCKETS: Dict[Stock, BitfinexWebsocket] = {}
+RECORDER = TickRecorder(RECORD_DIR) if RECORD_DIR else None
+LEDGER = Ledger(LEDGER_DIR)
+
+
+CLIENT_FACTORIES: Dict[Stock, Callable[[Credential], Client]] = {
+    Stock.BINANCE: lambda credential: BinanceClient(credential.api_key, credential.api_secret),
+    Stock.WHITEBIT: lambda credential: WhiteBitClient(credential.api_key, credential.api_secret),
+    Stock.BITFINEX: lambda credential: BfxClientWrapper(credential.api_key, credential.api_secret),
+}
+
+
+def get_credential_pool(stock: Stock) -> CredentialPool:
+    """
+    One pool per exchange, every bot on that exchange spreads its requests over its sub-account keys
+    """
+    if stock not in CREDENTIAL_POOLS:
+        CREDENTIAL_POOLS[stock] = CredentialPool(
+            load_credentials(stock.value, CREDENTIALS_PATH),
+            CLIENT_FACTORIES[stock],
+            limit=KEY_RATE_LIMIT,
+            window=KEY_RATE_WINDOW
+        )
+    return CREDENTIAL_POOLS[stock]
+
+
+def get_market_data_hub(stock: Stock, client: Client) -> MarketDataHub:
+    """
+    One hub per exchange, every bot on that exchange shares its ticker requests
+    """
+    if stock not in MARKET_DATA_HUBS:
+        MARKET_DATA_HUBS[stock] = MarketDataHub(client, interval=MARKET_DATA_INTERVAL)
+        if RECORDER is not None:
+            MARKET_DATA_HUBS[stock].add_listener(RECORDER.record_ticker)
+    return MARKET_DATA_HUBS[stock]
+
+
+def get_websocket(stock: Stock) -> Optional[BitfinexWebsocket]:
+    """
+    One push feed per exchange that has one, running on the BRIDGE loop thread.
+    Subscribe before start_websockets(), subscriptions are sent when the socket connects
+    """
+    if stock != Stock.BITFINEX:
+        return None
+    if stock not in WEBSOCKETS:
+        WEBSOCKETS[stock] = BitfinexWebsocket()
+    return WEBSOCKETS[stock]
+
+
+def start_websockets():
+    for websocket in WEBSOCKETS.values():
+        if websocket.listeners or websocket.trade_listeners:
+            BRIDGE.submit(websocket.run())
 
 
-class LocalOrder:
-    def __init__(self, buy, sell, amount):
-        self.buy = buy
-        self.sell = sell
-        self.amount = amount
+def end_session(liquidator: EmergencyLiquidator):
+    print()
+    print(f"STOP LOSS on {liquidator.paritet} finished in {liquidator.latency:.3f}s")
+    global END_SESSION
+    END_SESSION = True
 
-    def __str__(self):
-        return f"buy: {self.buy}, sell: {self.sell}, amount:{self.amount}"
+
+def book_liquidation(paritet):
+    """
+    :return: on_fill of the EmergencyLiquidator, books the liquidation sell like a grid fill
+    """
+    def on_fill(fill: Fill):
+        LEDGER.record_fill(paritet, SIDE_SELL, fill.price, fill.qty, fill.quote * FEE_RATE)
+
+    return on_fill
 
 
 def create_table():
-    table = []
-    for i in range(1, STEP_SIZE + 1):
-        table.append(LocalOrder(
-            buy=FIRST_PRICE + DIFFERENCE * (i - 1),
-            sell=FIRST_PRICE + DIFFERENCE * i,
-            amount=AMOUNT
-        ))
-    return table
+    return GridConfig(FIRST_PRICE, LAST_PRICE, STEP_SIZE, TOTAL_AMOUNT).levels()
 
 
 class PingPongBot:
@@ -77,69 +153,146 @@ class PingPongBot:
 
     def __init__(self):
         if STOCK == Stock.BITFINEX:
-            self.client = BfxClientWrapper(BITFINEX_API_KEY, BITFINEX_API_SECRET)
             self.paritet = f"t{CURRENCY_PAIR_FIRST}{CURRENCY_PAIR_SECOND}"
+            self.client = get_credential_pool(STOCK).client(self.paritet)
         elif STOCK == Stock.BINANCE:
-            self.client = BinanceClient(BINANCE_API_KEY, BINANCE_API_SECRET)
             self.paritet = f"{CURRENCY_PAIR_FIRST}{CURRENCY_PAIR_SECOND}"
+            self.client = get_credential_pool(STOCK).client(self.paritet)
         elif STOCK == Stock.WHITEBIT:
-            self.client = WhiteBitClient(WHITEBIT_API_KEY, WHITEBIT_API_SECRET)
             self.paritet = f"{CURRENCY_PAIR_FIRST}_{CURRENCY_PAIR_SECOND}"
+            self.client = get_credential_pool(STOCK).client(self.paritet)
         elif STOCK == Stock.MOCK:
             self.client = MockClient()
             self.paritet = "x"
         else:
             raise NameError("Did not find stock type or None")
 
-        self.table = create_table()
-        self.bid_ping_table: List[LocalOrder] = [LocalOrder(row.buy, row.sell, amount=AMOUNT) for row in self.table]
-        self.ask_pong_table: List[LocalOrder] = []
+        self.market_data = get_market_data_hub(STOCK, self.client)
+        self.market_data.subscribe(self.paritet)
+        websocket = get_websocket(STOCK)
+        if RECORDER is not None and websocket is not None:
+            websocket.subscribe_trades(self.paritet, RECORDER.record_trade)
+
+        self.stop_loss_guard = StopLossGuard(
+            EmergencyLiquidator(
+                self.client,
+                self.paritet,
+                asset=CURRENCY_PAIR_FIRST,
+                limit_price=STOP_LOSS_PRICE if STOP_LOSS_TYPE == OrderType.LIMIT else None,
+                step_size=STOP_LOSS_STEP_SIZE,
+                on_fill=book_liquidation(self.paritet)
+            ),
+            stop_price=STOP_LOSS_PRICE,
+            on_flat=end_session
+        )
+        if IS_STOP_LOSS_NEEDED:
+            # pushed prices reach the guard thread without waiting for the tick
+            self.market_data.add_listener(self.stop_loss_guard.on_ticker)
+            if websocket is not None:
+                websocket.subscribe_ticker(self.paritet, self.stop_loss_guard.on_ticker)
+
+        self.grid = GridManager(GridConfig(FIRST_PRICE, LAST_PRICE, STEP_SIZE, TOTAL_AMOUNT))
+        self.grid_watcher = GridConfigWatcher(GRID_CONFIG_PATH) if GRID_CONFIG_PATH else None
+        self.bid_ping_table: List[LocalOrder] = self.grid.bid_ping_table
+        self.ask_pong_table: List[LocalOrder] = self.grid.ask_pong_table
 
     def execute(self):
-        ticker = asyncio.get_event_loop().run_until_complete(self.client.get_ticker(self.paritet))
-        if ticker is None:
+        with TRACER.span("tick", symbol=self.paritet):
+            with TRACER.span("ticker"):
+                ticker = asyncio.get_event_loop().run_until_complete(self.market_data.get_ticker(self.paritet))
+            if ticker is None:
+                print()
+                print("Something went wrong while fetching TICKET")
+                return
+            if self.is_liquidating:
+                print()
+                print(f"STOP LOSS on {self.paritet} in progress, no orders are placed")
+                return
+            stock_price = ticker.last
+            LEDGER.mark(self.paritet, stock_price)
+            if RECORDER is not None:
+                with TRACER.span("depth"):
+                    self.record_depth()
             print()
-            print("Something went wrong while fetching TICKET")
-            return
-        stock_price = float(ticker.last)
-        print()
-        print(f"Current {self.paritet} PRICE: {stock_price}")
+            print(f"Current {self.paritet} PRICE: {stock_price}")
 
-        rows_to_buy = [row for row in self.bid_ping_table if row.buy >= stock_price]
-        rows_to_sell = [row for row in self.ask_pong_table if row.sell <= stock_price]
+            with TRACER.span("detect"):
+                self.adjust_grid(stock_price)
 
-        # Buy request to client
-        # brought_rows = asyncio.get_event_loop().run_until_complete(self.buy_rows(rows_to_buy))
+                rows_to_buy = [row for row in self.bid_ping_table if row.buy >= stock_price]
+                rows_to_sell = [row for row in self.ask_pong_table if row.sell <= stock_price]
 
-        # Sell request to client
-        # sold_rows = asyncio.get_event_loop().run_until_complete(self.sell_rows(rows_to_sell))
+            # Buy request to client
+            # brought_rows = asyncio.get_event_loop().run_until_complete(self.buy_rows(rows_to_buy))
 
-        brought_rows, sold_rows = asyncio.get_event_loop().run_until_complete(
-            self.execute_orders(rows_to_buy, rows_to_sell)
-        )
-        print()
-        print(f"Session bought {len(brought_rows)} rows")
-        print(f"Session sold {len(sold_rows)} rows")
-        global END_SESSION
-        asyncio.get_event_loop().run_until_complete(self.check_stop_loss(stock_price))
+            # Sell request to client
+            # sold_rows = asyncio.get_event_loop().run_until_complete(self.sell_rows(rows_to_sell))
+
+            with TRACER.span("execute_orders", buy=len(rows_to_buy), sell=len(rows_to_sell)):
+                brought_rows, sold_rows = asyncio.get_event_loop().run_until_complete(
+                    self.execute_orders(rows_to_buy, rows_to_sell)
+                )
+            print()
+            print(f"Session bought {len(brought_rows)} rows")
+            print(f"Session sold {len(sold_rows)} rows")
+            with TRACER.span("check_stop_loss"):
+                asyncio.get_event_loop().run_until_complete(self.check_stop_loss(stock_price))
+
+    def record_depth(self):
+        depth = asyncio.get_event_loop().run_until_complete(self.client.order_book(self.paritet))
+        if depth is not None:
+            RECORDER.record_depth(self.paritet, depth["bids"], depth["asks"])
+
+    def adjust_grid(self, stock_price):
+        """
+        Apply a reloaded grid config, then re-center the grid if the price left the band
+        """
+        if self.grid_watcher is not None:
+            config = self.grid_watcher.poll()
+            if config is not None and config != self.grid.config:
+                print()
+                print(f"Grid config reloaded: {self.grid.resize(config)}")
+        if AUTO_RECENTER:
+            diff = self.grid.recenter(stock_price)
+            if diff is not None:
+                print()
+                print(f"Grid re-centered to {self.grid.config.first_price}..{self.grid.config.last_price}: {diff}")
+
+    @property
+    def is_liquidating(self):
+        return self.stop_loss_guard.liquidator.triggered
 
     async def execute_orders(self, rows_to_buy, rows_to_sell):
+        if self.is_liquidating:  # price is at the stop, every bid level would buy the grid back
+            return [], []
         return await asyncio.gather(self.buy_rows(rows_to_buy), self.sell_rows(rows_to_sell))
 
     async def buy_rows(self, rows: List[LocalOrder]):
         """
         :param rows: List[LocalOrder]
         :return: List[LocalOrder]
-        asynchronously buy rows
-        if not successfully executed, it won't insert unsuccessful rows into returning value
+        asynchronously buy rows, levels triggered together are sent as one coalesced order
+        only levels covered by the executed amount are returned, the others stay in the bid table
+        and a level partly covered carries its part, its next order buys the rest
         """
-        all_brought_rows = await asyncio.gather(
-            *[self.client.buy_order_limit(paritet=self.paritet, amount=row.amount, price=row.buy) for row in rows]
+        orders = coalesce_buy_rows(rows, COALESCE_ORDERS)
+        all_brought_orders = await asyncio.gather(
+            *[self.client.buy_order_limit(paritet=self.paritet, amount=order.amount, price=order.price)
+              for order in orders]
         )
         success_rows = []
-        for row_index in range(len(all_brought_rows)):
-            if all_brought_rows[row_index] is not None:
-                success_rows.append(rows[row_index])
+        fills = await asyncio.gather(
+            *[settle(self.client, self.paritet, order, response)
+              for order, response in zip(orders, all_brought_orders)]
+        )
+        for order, response, fill in zip(orders, all_brought_orders, fills):
+            if response is None:
+                continue
+            if RECORDER is not None:
+                RECORDER.record_order(self.paritet, order.price, order.amount, SIDE_BUY)
+            if fill.qty > 0:
+                LEDGER.record_fill(self.paritet, SIDE_BUY, fill.price, fill.qty, fill.quote * FEE_RATE)
+            success_rows.extend(order.split(fill.qty))
 
         for buy_row in success_rows:
             if buy_row not in self.bid_ping_table:
@@ -153,47 +306,58 @@ class PingPongBot:
         """
         :param rows: List[LocalOrder]
         :return: List[LocalOrder]
-        asynchronously sell rows
-        if not successfully executed, it won't insert unsuccessful row into returning value
+        asynchronously sell rows, levels triggered together are sent as one coalesced order
+        only levels covered by the executed amount are returned, the others stay in the ask table
+        and a level partly covered carries its part, its next order sells the rest
         """
-        all_sold_rows = await asyncio.gather(
-            *[self.client.sell_order_limit(paritet=self.paritet, amount=row.amount, price=row.sell) for row in rows]
+        orders = coalesce_sell_rows(rows, COALESCE_ORDERS)
+        all_sold_orders = await asyncio.gather(
+            *[self.client.sell_order_limit(paritet=self.paritet, amount=order.amount, price=order.price)
+              for order in orders]
         )
         success_rows = []
-        for row_index in range(len(all_sold_rows)):
-            if all_sold_rows[row_index] is not None:
-                success_rows.append(rows[row_index])
+        fills = await asyncio.gather(
+            *[settle(self.client, self.paritet, order, response)
+              for order, response in zip(orders, all_sold_orders)]
+        )
+        for order, response, fill in zip(orders, all_sold_orders, fills):
+            if response is None:
+                continue
+            if RECORDER is not None:
+                RECORDER.record_order(self.paritet, order.price, order.amount, SIDE_SELL)
+            if fill.qty > 0:
+                LEDGER.record_fill(self.paritet, SIDE_SELL, fill.price, fill.qty, fill.quote * FEE_RATE)
+            success_rows.extend(order.split(fill.qty))
 
         for sell_row in success_rows:
             if sell_row not in self.ask_pong_table:
                 continue
             self.ask_pong_table.remove(sell_row)
-            self.bid_ping_table.append(sell_row)
+            if not sell_row.retired:
+                self.bid_ping_table.append(sell_row)
 
         return success_rows
 
     async def check_stop_loss(self, current_price):
-        if not IS_STOP_LOSS_NEEDED:
+        """
+        In-tick check, the guard thread started in start() normally catches the breach first.
+        The drawdown stop reads the ledger, it is only checked here
+        """
+        if MAX_DRAWDOWN is not None and LEDGER.position(self.paritet).drawdown >= MAX_DRAWDOWN:
+            print()
+            print(f"DRAWDOWN STOP on {self.paritet}: {LEDGER.position(self.paritet)}")
+            await self.stop_loss_guard.trigger()
             return
 
-        if STOP_LOSS_PRICE < current_price:  # 5 USD < 4 USD
+        if not IS_STOP_LOSS_NEEDED:
             return
 
-        total_sell = None
-        if STOP_LOSS_TYPE == OrderType.MARKET:
-            total_sell = await self.client.sell_order_limit(self.paritet, STOP_LOSS_PRICE / 2, TOTAL_AMOUNT)
-        elif STOP_LOSS_TYPE == OrderType.LIMIT:
-            total_sell = await self.client.sell_order_limit(self.paritet, STOP_LOSS_PRICE, TOTAL_AMOUNT)
-
-        if total_sell is None:
-            print()
-            print("Something went wrong while STOP LOSS")
-
-        global END_SESSION
-        END_SESSION = True
+        await self.stop_loss_guard.check(current_price)
 
     def print_order_table(self):
         print()
+        print(f"====== {self.paritet} POSITION ======")
+        print(LEDGER.position(self.paritet))
         print("====== BUY TABLE ======")
         for row in self.bid_ping_table:
             print(row)
@@ -212,10 +376,21 @@ def scheduled_task():
 
 
 def start():
+    if LOOP_STALL_THRESHOLD is not None:
+        LoopWatchdog(asyncio.get_event_loop(), threshold=LOOP_STALL_THRESHOLD).start()
+    if IS_STOP_LOSS_NEEDED:
+        bot.stop_loss_guard.start()
+    start_websockets()
     schedule.every(TIME_DURATION).seconds.do(scheduled_task)
 
+    TRACER.install_signal(TRACE_PATH, last="tick")
+    PROFILER.directory = PROFILE_DIR
+    PROFILER.install_signal(PROFILE_SECONDS)
+
     while not END_SESSION:
         schedule.run_pending()
+        PROFILER.poll()
+    PROFILER.stop()
 
 
 # print(asyncio.get_event_loop().run_until_complete(bot.client.get_wallet("USDT")).available)
@@ -0,0 +1,43 @@
+import asyncio
+import weakref
+
+import aiohttp
+
+
+class SessionPool:
+    """
+    One aiohttp.ClientSession per event loop, shared by every client holding the pool,
+    so requests reuse keep-alive connections instead of opening a new one each time.
+    """
+
+    def __init__(self, limit=100, dns_cache_ttl=300):
+        """
+        :param limit: max simultaneous connections per session
+        :param dns_cache_ttl: in seconds
+        """
+        self.limit = limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.sessions = weakref.WeakKeyDictionary()
+
+    def get(self) -> aiohttp.ClientSession:
+        """
+        :return: session bound to the running loop, must be called from a coroutine
+        """
+        loop = asyncio.get_event_loop()
+        session = self.sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=self.dns_cache_ttl)
+            session = aiohttp.ClientSession(connector=connector)
+            self.sessions[loop] = session
+        return session
+
+    async def close(self):
+        """
+        Close the session of the running loop
+        """
+        session = self.sessions.pop(asyncio.get_event_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+SESSION_POOL = SessionPool()
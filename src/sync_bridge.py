@@ -0,0 +1,106 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Optional
+
+from src.session import SESSION_POOL
+
+DEFAULT_TIMEOUT = 30  # in seconds
+
+
+class LoopThread:
+    """
+    One event loop running forever on a daemon thread.
+    Coroutines are submitted from any thread, and every client request made on this loop
+    shares the pooled session of the loop.
+    """
+
+    def __init__(self, name="client-loop"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self.thread = threading.Thread(target=self.run, args=(ready,), name=self.name, daemon=True)
+            self.thread.start()
+            ready.wait()
+
+    def run(self, ready: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def submit(self, coroutine) -> concurrent.futures.Future:
+        """
+        :return: future resolved on the loop thread, safe to wait on from any other thread
+        """
+        if self.thread is None or not self.thread.is_alive():
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run_sync(self, coroutine, timeout=DEFAULT_TIMEOUT):
+        """
+        :param timeout: in seconds, the coroutine is canceled when it runs longer
+        :return: result of the coroutine
+        Blocks the calling thread, works from worker threads and from inside another running loop
+        """
+        if threading.current_thread() is self.thread:
+            coroutine.close()
+            raise RuntimeError("run_sync called from the loop thread, await the coroutine instead")
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise concurrent.futures.TimeoutError(f"no result after {timeout}s") from None
+
+    def stop(self):
+        with self.lock:
+            if self.thread is None:
+                return
+            asyncio.run_coroutine_threadsafe(SESSION_POOL.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.thread = None
+
+
+BRIDGE = LoopThread()
+
+
+class SyncClient:
+    """
+    Sync facade of an async Client backed by the BRIDGE loop thread.
+
+    Usage:
+        client = SyncClient(BinanceClient(API_KEY, API_SECRET))
+        ticker = client.get_ticker("NEOUSDT")  # blocking, with timeout
+        future = client.submit("buy_order_limit", "NEOUSDT", 36, 0.5)  # concurrent.futures.Future
+    """
+
+    def __init__(self, client, bridge: LoopThread = BRIDGE, timeout=DEFAULT_TIMEOUT):
+        self.client = client
+        self.bridge = bridge
+        self.timeout = timeout
+
+    def submit(self, method, *args, **kwargs) -> concurrent.futures.Future:
+        return self.bridge.submit(getattr(self.client, method)(*args, **kwargs))
+
+    def call(self, method, *args, timeout=None, **kwargs):
+        return self.bridge.run_sync(getattr(self.client, method)(*args, **kwargs), timeout or self.timeout)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        def blocking(*args, timeout=None, **kwargs):
+            return self.call(name, *args, timeout=timeout, **kwargs)
+
+        return blocking
@@ -0,0 +1,172 @@
+import cProfile
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+
+class Span(NamedTuple):
+    name: str
+    category: str
+    start: int  # perf_counter_ns
+    duration: int  # ns
+    thread_id: int
+    span_id: int  # 0 for synchronous spans
+    args: Optional[dict]
+
+
+class Tracer:
+    """
+    Keeps the last `capacity` spans in a ring buffer and exports them as Chrome trace JSON
+    (open in chrome://tracing or https://ui.perfetto.dev).
+
+    Synchronous spans nest on their thread. Asynchronous spans (exchange requests running
+    concurrently on one loop) are exported as async events so they do not break the nesting.
+    """
+
+    def __init__(self, capacity=100000, enabled=True):
+        self.spans = deque(maxlen=capacity)
+        self.enabled = enabled
+        self.span_ids = itertools.count(1)
+        self.origin = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name, category="bot", asynchronous=False, **args):
+        """
+        Usage:
+            with TRACER.span("ticker", symbol=paritet):
+                ticker = await hub.get_ticker(paritet)
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append(Span(
+                name=name,
+                category=category,
+                start=start,
+                duration=time.perf_counter_ns() - start,
+                thread_id=threading.get_ident(),
+                span_id=next(self.span_ids) if asynchronous else 0,
+                args=args or None
+            ))
+
+    def clear(self):
+        self.spans.clear()
+
+    def last(self, name):
+        """
+        :return: last synchronous span called name and every span that started during it, on any thread
+        """
+        spans = list(self.spans)
+        root = next((span for span in reversed(spans) if span.name == name and not span.span_id), None)
+        if root is None:
+            return []
+        end = root.start + root.duration
+        return [span for span in spans if root.start <= span.start <= end]
+
+    def chrome_trace(self, spans=None):
+        """
+        :param spans: defaults to the whole ring buffer
+        """
+        pid = os.getpid()
+        events = []
+        for span in list(self.spans) if spans is None else spans:
+            event = {
+                "name": span.name,
+                "cat": span.category,
+                "ts": (span.start - self.origin) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+            }
+            if span.args:
+                event["args"] = span.args
+            if span.span_id:
+                events.append(dict(event, ph="b", id=span.span_id))
+                events.append(dict(event, ph="e", id=span.span_id, ts=event["ts"] + span.duration / 1000))
+            else:
+                events.append(dict(event, ph="X", dur=span.duration / 1000))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path, last=None):
+        """
+        :param last: name of a span, Ex: "tick", to write only its last occurrence and its children.
+            None to write the ring buffer
+        """
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(None if last is None else self.last(last)), f)
+        return path
+
+    def install_signal(self, path, last=None, signum=getattr(signal, "SIGUSR2", None)):
+        """
+        kill -USR2 <pid> writes the ring buffer to path, or the last span called `last` with its children
+        """
+        if signum is None:
+            print("Signals are not supported on this platform, call Tracer.export_chrome_trace instead")
+            return
+        signal.signal(signum, lambda *_: print(f"Trace written to {self.export_chrome_trace(path, last)}"))
+
+
+class Profiler:
+    """
+    cProfile of a live bot for a number of seconds, started from code or by a signal.
+
+    cProfile only follows the thread that enabled it, so the profile is started and stopped
+    on the bot thread: the signal handler runs there, and poll() is called from the bot loop.
+    """
+
+    def __init__(self, directory="."):
+        self.directory = directory
+        self.profile = None
+        self.deadline = None
+
+    @property
+    def is_running(self):
+        return self.profile is not None
+
+    def start(self, seconds=30):
+        if self.is_running:
+            return
+        self.profile = cProfile.Profile()
+        self.deadline = time.monotonic() + seconds
+        self.profile.enable()
+
+    def poll(self):
+        """
+        :return: path of the written profile when the profiling window just ended
+        """
+        if not self.is_running or time.monotonic() < self.deadline:
+            return None
+        return self.stop()
+
+    def stop(self):
+        if not self.is_running:
+            return None
+        self.profile.disable()
+        path = os.path.join(self.directory, "profile-{}.prof".format(time.strftime("%Y%m%d-%H%M%S")))
+        self.profile.dump_stats(path)
+        self.profile = None
+        print()
+        print(f"Profile written to {path}")
+        return path
+
+    def install_signal(self, seconds=30, signum=getattr(signal, "SIGUSR1", None)):
+        """
+        kill -USR1 <pid> profiles the bot for `seconds`
+        """
+        if signum is None:
+            print("Signals are not supported on this platform, call Profiler.start instead")
+            return
+        signal.signal(signum, lambda *_: self.start(seconds))
+
+
+TRACER = Tracer()
+PROFILER = Profiler()
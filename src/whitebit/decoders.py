@@ -0,0 +1,63 @@
+"""
+Per-endpoint decoders of WhiteBit responses.
+Each one takes the raw response text and returns the typed model with only the fields the bot uses.
+"""
+import json
+from typing import Dict
+
+from src.client import Ticker, Wallet
+
+
+class DecodeException(Exception):
+    pass
+
+
+def decode_json(text):
+    return json.loads(text, parse_float=float)
+
+
+def load(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise DecodeException("not a JSON response: {}".format(text[:200]))
+
+
+def decode_ticker(text) -> Ticker:
+    """
+    api/v1/public/ticker?market=
+    {"success":true,"message":null,"result":{"bid":"9412.1","ask":"9416.33",...,"last":"9409.13",...}}
+    """
+    result = load(text)["result"]
+    return Ticker(bid=float(result["bid"]), ask=float(result["ask"]), last=float(result["last"]))
+
+
+def tickers_decoder(markets):
+    """
+    api/v1/public/tickers
+    {"success":true,"message":null,"result":{"BTC_USDT":{"at":1594,"ticker":{"bid":"..","ask":"..","last":".."}}}}
+    :return: decoder keeping only the given markets
+    A set is kept by reference, markets added to it before the response arrives are decoded too
+    """
+    markets = markets if isinstance(markets, (set, frozenset)) else list(markets)
+
+    def decode_tickers(text) -> Dict[str, Ticker]:
+        result = load(text)["result"]
+        tickers = {}
+        for market in markets:
+            ticker = result.get(market)
+            if ticker is None:
+                continue
+            ticker = ticker["ticker"]
+            tickers[market] = Ticker(bid=float(ticker["bid"]), ask=float(ticker["ask"]), last=float(ticker["last"]))
+        return tickers
+
+    return decode_tickers
+
+
+def decode_wallet(text) -> Wallet:
+    """
+    api/v4/trade-account/balance with ticker
+    {"available":"0.01","freeze":"0"}
+    """
+    return Wallet(available=float(load(text)["available"]))
@@ -1,11 +1,13 @@
-import asyncio
 import base64
 import hashlib
 import hmac
 import json
 import time
-import aiohttp
-from src.client import Client, Wallet, Ticker
+from src.client import Client, Fill
+from src.session import SESSION_POOL, SessionPool
+from src.sync_bridge import BRIDGE, DEFAULT_TIMEOUT
+from src.whitebit.decoders import decode_json, decode_ticker, decode_wallet, tickers_decoder
+from src.tracing import TRACER
 
 
 class FetchException(Exception):
@@ -13,43 +15,44 @@ class FetchException(Exception):
 
 
 class WhiteBitClient(Client):
-    def __init__(self, API_KEY, API_SECRET, host="https://whitebit.com"):
+    def __init__(self, API_KEY, API_SECRET, host="https://whitebit.com", pool: SessionPool = SESSION_POOL):
         self.API_KEY = API_KEY
         self.API_SECRET = API_SECRET
         self.host = host  # last slash. Do not use https://whitebit.com/
+        self.pool = pool
 
-    async def post(self, endpoint, data, params=""):
+    async def post(self, endpoint, data, params="", decoder=decode_json):
         """
         Send a pre-signed POST request to the whitebit api
+        decoder turns the response text into the returned value
 
         @return response
         """
         url = '{}/{}'.format(self.host, endpoint)
         headers, paydata = self.generate_headers(data)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url + params, headers=headers, data=paydata) as resp:
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().post(url + params, headers=headers, data=paydata) as resp:
                 text = await resp.text()
                 if resp.status < 200 or resp.status > 299:
                     raise FetchException('POST {} failed with status {} - {}'
                                          .format(url, resp.status, text))
-                parsed = json.loads(text, parse_float=float)
-                return parsed
+                return decoder(text)
 
-    async def fetch(self, endpoint, params=""):
+    async def fetch(self, endpoint, params="", decoder=decode_json):
         """
         Send a GET request to the whitebit api
+        decoder turns the response text into the returned value
 
         @return reponse
         """
         url = '{}/{}{}'.format(self.host, endpoint, params)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
+        with TRACER.span(endpoint, "request", asynchronous=True):
+            async with self.pool.get().get(url) as resp:
                 text = await resp.text()
                 if resp.status != 200:
                     raise FetchException('GET {} failed with status {} - {}'
                                          .format(url, resp.status, text))
-                parsed = json.loads(text, parse_float=float)
-                return parsed
+                return decoder(text)
 
     def signature_payload(self, data):
         data_json = json.dumps(data, separators=(',', ':'))  # use separators param for deleting spaces
@@ -68,28 +71,43 @@ class WhiteBitClient(Client):
         }, data_json
 
     async def get_ticker(self, market):
-        ticker = None
         try:
-            ticker = await self.fetch("api/v1/public/ticker", "?market={}".format(market))
-            return Ticker(bid=ticker["result"]['bid'], ask=ticker["result"]['ask'], last=ticker['result']['last'])
-        except FetchException as e:
+            return await self.fetch("api/v1/public/ticker", "?market={}".format(market), decoder=decode_ticker)
+        except Exception as e:
             print(e)
             return None
-        except:
-            print(ticker)
+
+    async def get_tickers(self, markets):
+        """
+        :param markets: iterable of markets. Ex: ["NEO_USDT", "BTC_USDT"]
+        :return: Dict[str, Ticker] for requested markets only
+        One request for every market on the exchange
+        """
+        try:
+            return await self.fetch("api/v1/public/tickers", decoder=tickers_decoder(markets))
+        except Exception as e:
+            print(e)
             return None
 
-    def get_ticker_synchronized(self, market):
+    async def order_book(self, market):
+        """
+        :param market: Ex: NEO_USDT
+        :return: {"asks": [["41.1", "0.5"], ...], "bids": [["40.9", "1.2"], ...], ...}
+        """
         try:
-            t = asyncio.ensure_future(self.get_ticker(market))
-            ticker = asyncio.get_event_loop().run_until_complete(t)
-            return ticker
+            return await self.fetch("api/v4/public/orderbook/{}".format(market))
+        except Exception as e:
+            print(e)
+            return None
+
+    def get_ticker_synchronized(self, market, timeout=DEFAULT_TIMEOUT):
+        try:
+            return BRIDGE.run_sync(self.get_ticker(market), timeout)
         except Exception as e:
             print(e)
             return None
 
     async def get_wallet(self, market):
-        wallet = None
         try:
             request = 'api/v4/trade-account/balance'
             nonce = str(int(time.time()))
@@ -98,20 +116,14 @@ class WhiteBitClient(Client):
                 "request": "/" + request,
                 "nonce": nonce
             }
-            wallet = await self.post(request, paydata)
-            return Wallet(available=wallet["available"])
-        except FetchException as e:
+            return await self.post(request, paydata, decoder=decode_wallet)
+        except Exception as e:
             print(e)
             return None
-        except:
-            print(wallet)
-            return None
 
-    def get_wallets_synchronized(self, market):
+    def get_wallets_synchronized(self, market, timeout=DEFAULT_TIMEOUT):
         try:
-            t = asyncio.ensure_future(self.get_wallet(market))
-            wallets = asyncio.get_event_loop().run_until_complete(t)
-            return wallets
+            return BRIDGE.run_sync(self.get_wallet(market), timeout)
         except Exception as e:
             print(e)
             return None
@@ -194,20 +206,103 @@ class WhiteBitClient(Client):
             print(e)
             return None
 
-    def buy_order_market_synchronized(self, market, amount):
+    async def get_open_orders(self, market):
+        """
+        :param market: Ex: NEO_USDT
+        :return: active orders of the market
+        """
         try:
-            t = asyncio.ensure_future(self.buy_order_market(market, amount))
-            order = asyncio.get_event_loop().run_until_complete(t)
-            return order
+            request = 'api/v4/orders'
+            nonce = str(int(time.time()))
+            paydata = {
+                "market": "{}".format(market),
+                "request": "/" + request,
+                "nonce": nonce
+            }
+            return await self.post(request, paydata)
         except Exception as e:
             print(e)
             return None
 
-    def sell_order_market_synchronized(self, market, amount):
+    async def cancel_all(self, market):
+        """
+        :param market: Ex: NEO_USDT
+        :return:
+        Cancel every open order of the market with a single request
+        """
         try:
-            t = asyncio.ensure_future(self.sell_order_market(market, amount))
-            order = asyncio.get_event_loop().run_until_complete(t)
-            return order
+            request = 'api/v4/order/cancel/all'
+            nonce = str(int(time.time()))
+            paydata = {
+                "market": "{}".format(market),
+                "request": "/" + request,
+                "nonce": nonce
+            }
+            return await self.post(request, paydata)
         except Exception as e:
             print(e)
             return None
+
+    async def cancel_order(self, market, order_id):
+        try:
+            request = 'api/v4/order/cancel'
+            nonce = str(int(time.time()))
+            paydata = {
+                "market": "{}".format(market),
+                "orderId": order_id,
+                "request": "/" + request,
+                "nonce": nonce
+            }
+            return await self.post(request, paydata)
+        except Exception as e:
+            print(e)
+            return None
+
+    async def get_order(self, market, order_id):
+        """
+        Active order with its deals so far, otherwise the executed order from the history
+        """
+        try:
+            request = 'api/v4/orders'
+            paydata = {
+                "market": "{}".format(market),
+                "orderId": order_id,
+                "request": "/" + request,
+                "nonce": str(int(time.time()))
+            }
+            active = await self.post(request, paydata)
+            if active:
+                return active[0]
+            request = 'api/v4/trade-account/order/history'
+            paydata = {
+                "market": "{}".format(market),
+                "orderId": order_id,
+                "request": "/" + request,
+                "nonce": str(int(time.time()))
+            }
+            history = await self.post(request, paydata)
+            return history[market][0]
+        except Exception as e:
+            print(e)
+            return None
+
+    def buy_order_market_synchronized(self, market, amount, timeout=DEFAULT_TIMEOUT):
+        try:
+            return BRIDGE.run_sync(self.buy_order_market(market, amount), timeout)
+        except Exception as e:
+            print(e)
+            return None
+
+    def sell_order_market_synchronized(self, market, amount, timeout=DEFAULT_TIMEOUT):
+        try:
+            return BRIDGE.run_sync(self.sell_order_market(market, amount), timeout)
+        except Exception as e:
+            print(e)
+            return None
+
+    @staticmethod
+    def fill_of(order, amount, price) -> Fill:
+        """
+        {"orderId": 4180284841, ..., "dealStock": "0.1", "dealMoney": "4.1", "amount": "0.1", "left": "0", ...}
+        """
+        return Fill(qty=float(order["dealStock"]), quote=float(order["dealMoney"]))
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from src.binance.rest import BinanceClient
+from src.mock.fake_binance import FakeBinance
+from src.session import SESSION_POOL
+
+
+@pytest.fixture
+def loop():
+    """
+    Fresh event loop per test, coroutines are run with loop.run_until_complete
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(SESSION_POOL.close())
+    loop.close()
+
+
+@pytest.fixture
+def exchange(loop):
+    """
+    FakeBinance with 1 NEO and 100 USDT, NEOUSDT at 40
+    """
+    exchange = FakeBinance(prices={"NEOUSDT": 40.0}, balances={"NEO": 1.0, "USDT": 100.0})
+    loop.run_until_complete(exchange.start())
+    yield exchange
+    loop.run_until_complete(exchange.stop())
+
+
+@pytest.fixture
+def client(exchange):
+    return BinanceClient("key", "secret", host=exchange.host)
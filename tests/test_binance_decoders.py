@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.binance.decoders import DecodeException, decode_open_orders, decode_ticker, tickers_decoder, wallet_decoder
+from src.client import OpenOrder
+
+COMPACT = (',', ':')
+SPACED = (', ', ': ')
+
+
+@pytest.mark.parametrize("separators", [COMPACT, SPACED])
+def test_ticker(separators):
+    text = json.dumps({"price": "40.12000000", "symbol": "NEOUSDT"}, separators=separators)
+    assert decode_ticker(text).last == 40.12
+
+
+def test_ticker_missing_price():
+    with pytest.raises(DecodeException):
+        decode_ticker('{"code":-1121,"msg":"Invalid symbol."}')
+
+
+@pytest.mark.parametrize("separators", [COMPACT, SPACED])
+def test_tickers_keep_wanted_symbols(separators):
+    text = json.dumps([
+        {"symbol": "ETHBTC", "price": "0.03"},
+        {"price": "40.1", "symbol": "NEOUSDT"},
+        {"symbol": "BTCUSDT", "price": "60000.0"},
+    ], separators=separators, indent=2 if separators == SPACED else None)
+    tickers = tickers_decoder(["NEOUSDT", "BTCUSDT"])(text)
+    assert {symbol: ticker.last for symbol, ticker in tickers.items()} == {"NEOUSDT": 40.1, "BTCUSDT": 60000.0}
+
+
+def test_tickers_follow_live_symbol_set():
+    symbols = {"NEOUSDT"}
+    decode = tickers_decoder(symbols)
+    symbols.add("ETHBTC")
+    assert set(decode('[{"symbol":"ETHBTC","price":"0.03"},{"symbol":"NEOUSDT","price":"40.1"}]')) == symbols
+
+
+@pytest.mark.parametrize("separators", [COMPACT, SPACED])
+def test_wallet(separators):
+    text = json.dumps({"canTrade": True, "balances": [
+        {"asset": "NEO0", "free": "9.0", "locked": "0.0"},
+        {"free": "1.5", "locked": "0.0", "asset": "NEO"},
+        {"asset": "USDT", "free": "100.0", "locked": "0.0"},
+    ]}, separators=separators)
+    assert wallet_decoder("NEO")(text).available == 1.5
+    assert wallet_decoder("BTC")(text).available == 0.0
+
+
+def test_wallet_error_response():
+    with pytest.raises(DecodeException):
+        wallet_decoder("NEO")('{"code":-2015,"msg":"Invalid API-key, IP, or permissions for action."}')
+
+
+@pytest.mark.parametrize("separators", [COMPACT, SPACED])
+def test_open_orders(separators):
+    text = json.dumps([
+        {"symbol": "NEOUSDT", "orderId": 1, "price": "39.5", "origQty": "0.5", "stopPrice": "0.0",
+         "origQuoteOrderQty": "0.0", "side": "BUY"},
+        {"side": "SELL", "origQty": "0.25", "price": "41.0", "orderId": 2, "symbol": "NEOUSDT"},
+    ], separators=separators)
+    assert decode_open_orders(text) == [OpenOrder(39.5, 1, 0.5, "BUY"), OpenOrder(41.0, 2, 0.25, "SELL")]
+
+
+def test_open_orders_empty():
+    assert decode_open_orders("[]") == []
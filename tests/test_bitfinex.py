@@ -0,0 +1,100 @@
+import pytest
+
+from src.bitfinex.rest import BfxClientWrapper
+from src.bitfinex.transport import BitfinexRest, BitfinexWebsocket
+from src.client import SIDE_BUY, SIDE_SELL, Ticker
+
+TICKER = [40.1, 10, 40.2, 12, -0.5, -0.01, 40.15, 1000, 41, 39]
+
+
+def subscribed(websocket, chan_id, symbol):
+    websocket.on_message({"event": "subscribed", "channel": "ticker", "chanId": chan_id, "symbol": symbol})
+
+
+def test_websocket_ticker_update_reaches_listeners():
+    websocket = BitfinexWebsocket()
+    seen = []
+    websocket.subscribe_ticker("tNEOUSD", lambda symbol, ticker: seen.append((symbol, ticker)))
+    subscribed(websocket, 7, "tNEOUSD")
+    websocket.on_message([7, TICKER])
+    assert seen == [("tNEOUSD", Ticker(bid=40.1, ask=40.2, last=40.15))]
+    assert websocket.get_ticker("tNEOUSD").last == 40.15
+
+
+def test_websocket_ignores_heartbeat_and_unknown_channels():
+    websocket = BitfinexWebsocket()
+    seen = []
+    websocket.subscribe_ticker("tNEOUSD", lambda symbol, ticker: seen.append(symbol))
+    subscribed(websocket, 7, "tNEOUSD")
+    websocket.on_message([7, "hb"])
+    websocket.on_message([8, TICKER])
+    websocket.on_message({"event": "info", "version": 2})
+    assert seen == []
+    assert websocket.get_ticker("tNEOUSD") is None
+
+
+class Wallets(BitfinexRest):
+    def __init__(self, wallets):
+        super().__init__("key", "secret")
+        self.wallets = wallets
+
+    async def post(self, endpoint, data=None):
+        assert endpoint == "auth/r/wallets"
+        return self.wallets
+
+
+WALLETS = [
+    ["funding", "NEO", 5.0, 0, 5.0, None, None],
+    ["exchange", "NEO", 2.0, 0, 1.5, None, None],
+    ["margin", "NEO", 3.0, 0, None, None, None],
+    ["exchange", "USD", 100.0, 0, 80.0, None, None],
+]
+
+
+@pytest.mark.parametrize("wallet_type, available", [("exchange", 1.5), ("margin", 3.0), ("funding", 5.0)])
+def test_wallet_of_type_uses_available_balance(loop, wallet_type, available):
+    wallet = loop.run_until_complete(Wallets(WALLETS).get_wallet("NEO", wallet_type))
+    assert wallet.available == available
+
+
+def test_missing_wallet_is_empty(loop):
+    assert loop.run_until_complete(Wallets(WALLETS).get_wallet("BTC")).available == 0.0
+
+
+def test_fill_of_order_notification():
+    order = [101, None, 1, "tNEOUSD", 0, 0, 0.2, 1.0, "LIMIT", None, None, None, 0, "PARTIALLY FILLED", None, None,
+             40.0, 39.9]
+    notification = [0, "on-req", None, None, [order], None, "SUCCESS", "Submitting limit sell order"]
+    assert BfxClientWrapper.order_id_of(notification) == 101
+    fill = BfxClientWrapper.fill_of(notification, 1.0, 40.0)
+    assert fill.qty == pytest.approx(0.8)
+    assert fill.price == pytest.approx(39.9)
+
+
+def test_websocket_trades_snapshot_and_executed_updates():
+    websocket = BitfinexWebsocket()
+    trades = []
+    websocket.subscribe_trades("tNEOUSD", lambda *trade: trades.append(trade))
+    websocket.on_message({"event": "subscribed", "channel": "trades", "chanId": 9, "symbol": "tNEOUSD"})
+    websocket.on_message([9, [[1, 1600000000000, 0.5, 40.1], [2, 1600000000001, -0.25, 40.0]]])
+    websocket.on_message([9, "te", [3, 1600000000002, -1.0, 39.9]])
+    websocket.on_message([9, "tu", [3, 1600000000002, -1.0, 39.9]])
+    websocket.on_message([9, "hb"])
+    assert trades == [
+        ("tNEOUSD", 40.1, 0.5, SIDE_BUY, 1600000000000000000),
+        ("tNEOUSD", 40.0, 0.25, SIDE_SELL, 1600000000001000000),
+        ("tNEOUSD", 39.9, 1.0, SIDE_SELL, 1600000000002000000),
+    ]
+
+
+def test_order_book_split_by_side(loop):
+    client = BfxClientWrapper("key", "secret")
+
+    async def book(symbol, precision="P0"):
+        return [[40.1, 2, 1.5], [40.0, 1, 0.5], [40.2, 1, -0.75]]
+
+    client.client.get_book = book
+    assert loop.run_until_complete(client.order_book("tNEOUSD")) == {
+        "bids": [[40.1, 1.5], [40.0, 0.5]],
+        "asks": [[40.2, 0.75]],
+    }
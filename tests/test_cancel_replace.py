@@ -0,0 +1,60 @@
+import pytest
+
+from src.client import BUY, SELL, CancelReplaceException, Client
+
+SYMBOL = "NEOUSDT"
+
+
+def rest_sell(loop, client, price=41.0, amount=0.5):
+    return client.order_id_of(loop.run_until_complete(client.sell_order_limit(SYMBOL, price, amount)))
+
+
+def fallback(client, *args):
+    """
+    Sequential Client.cancel_replace on the Binance client, as used by exchanges without a native endpoint
+    """
+    return Client.cancel_replace(client, *args)
+
+
+def test_native_replaces_the_order(loop, exchange, client):
+    order_id = rest_sell(loop, client)
+    replaced = loop.run_until_complete(client.cancel_replace(SYMBOL, order_id, SELL, 42.0, 0.5))
+    assert list(exchange.open_orders) == [client.order_id_of(replaced)]
+    assert exchange.open_orders[client.order_id_of(replaced)]["price"] == 42.0
+    assert exchange.locked["NEO"] == pytest.approx(0.5)
+
+
+def test_native_rejected_replacement_raises(loop, exchange, client):
+    order_id = rest_sell(loop, client)
+    with pytest.raises(CancelReplaceException) as raised:
+        loop.run_until_complete(client.cancel_replace(SYMBOL, order_id, SELL, 42.0, 5.0))
+    assert raised.value.order_id == order_id
+    assert exchange.open_orders == {}
+    assert exchange.free["NEO"] == pytest.approx(1.0)
+
+
+def test_native_unknown_order_sends_nothing(loop, exchange, client):
+    assert loop.run_until_complete(client.cancel_replace(SYMBOL, 999, BUY, 39.0, 0.5)) is None
+    assert exchange.open_orders == {}
+
+
+def test_fallback_replaces_the_order(loop, exchange, client):
+    order_id = rest_sell(loop, client, amount=1.0)  # the whole balance, the new order needs the canceled one's lock
+    replaced = loop.run_until_complete(fallback(client, SYMBOL, order_id, SELL, 42.0, 1.0))
+    assert list(exchange.open_orders) == [client.order_id_of(replaced)]
+    assert exchange.locked["NEO"] == pytest.approx(1.0)
+
+
+def test_fallback_keeps_the_order_when_the_cancel_fails(loop, exchange, client):
+    order_id = rest_sell(loop, client)
+    exchange.execute(order_id, 0.5)
+    assert loop.run_until_complete(fallback(client, SYMBOL, order_id, SELL, 42.0, 0.5)) is None
+    assert exchange.open_orders == {}
+    assert len(exchange.orders) == 1  # no new order was sent
+
+
+def test_fallback_rejected_replacement_raises(loop, exchange, client):
+    order_id = rest_sell(loop, client)
+    with pytest.raises(CancelReplaceException):
+        loop.run_until_complete(fallback(client, SYMBOL, order_id, SELL, 42.0, 5.0))
+    assert exchange.open_orders == {}
@@ -0,0 +1,117 @@
+import json
+import time
+
+import pytest
+
+from src.credentials import Credential, CredentialException, CredentialPool, KeySlot, RateWindow, load_credentials
+
+
+class KeyClient:
+    """
+    Answers every request with the name of its key
+    """
+
+    def __init__(self, credential):
+        self.name = credential.name
+
+    async def get_ticker(self, paritet):
+        return self.name
+
+    async def get_wallet(self, paritet):
+        return self.name
+
+    async def cancel_order(self, symbol, order_id):
+        return self.name
+
+
+def credentials(*pinned):
+    return [Credential(f"sub-{i}", f"key-{i}", f"secret-{i}", pairs) for i, pairs in enumerate(pinned)]
+
+
+def test_load_from_environment():
+    environ = {
+        "BINANCE_API_KEY": "main-key", "BINANCE_API_SECRET": "main-secret",
+        "BINANCE_API_KEY_SUB1": "sub-key", "BINANCE_API_SECRET_SUB1": "sub-secret",
+        "WHITEBIT_API_KEY": "other",
+    }
+    assert load_credentials("BINANCE", environ=environ) == [
+        Credential("main", "main-key", "main-secret"),
+        Credential("sub1", "sub-key", "sub-secret"),
+    ]
+
+
+def test_key_without_secret_raises():
+    with pytest.raises(CredentialException):
+        load_credentials("BINANCE", environ={"BINANCE_API_KEY_SUB1": "sub-key"})
+    with pytest.raises(CredentialException):
+        load_credentials("BINANCE", environ={})
+
+
+def test_load_from_file(tmp_path):
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps({"BINANCE": [
+        {"name": "sub-1", "api_key": "k1", "api_secret": "s1", "pairs": ["NEOUSDT"]},
+        {"api_key": "k2", "api_secret": "s2"},
+    ]}))
+    assert load_credentials("BINANCE", path=str(path)) == [
+        Credential("sub-1", "k1", "s1", ("NEOUSDT",)),
+        Credential("1", "k2", "s2"),
+    ]
+
+
+def test_pinned_pairs_and_least_loaded_assignment():
+    pool = CredentialPool(credentials(("NEOUSDT", "BTCUSDT"), ()), KeyClient)
+    assert pool.client("NEOUSDT").credential.name == "sub-0"
+    assert pool.client("ETHUSDT").credential.name == "sub-1"
+    assert pool.client("XRPUSDT").credential.name == "sub-1"
+    assert pool.client("LTCUSDT").credential.name == "sub-0"
+
+
+def test_pair_sticks_to_its_key_across_clients():
+    pool = CredentialPool(credentials((), ()), KeyClient)
+    first = pool.client("NEOUSDT").credential
+    pool.client("ETHUSDT")
+    pool.client("XRPUSDT")
+    assert pool.client("NEOUSDT").credential == first
+
+
+def test_account_calls_use_the_pair_key_public_calls_the_freest(loop):
+    pool = CredentialPool(credentials(("NEOUSDT",), ()), KeyClient, limit=10, window=60)
+    client = pool.client("NEOUSDT")
+
+    async def calls():
+        return [await client.get_wallet("NEOUSDT") for _ in range(3)] + [await client.get_ticker("NEOUSDT")]
+
+    assert loop.run_until_complete(calls()) == ["sub-0", "sub-0", "sub-0", "sub-1"]
+    assert pool.usage() == {"sub-0": 3, "sub-1": 1}
+
+
+def test_rate_window_delays_then_prunes():
+    rate = RateWindow(limit=2, window=0.05)
+    assert rate.try_hit() == 0
+    assert rate.try_hit() == 0
+    delay = rate.try_hit()
+    assert 0 < delay <= 0.05
+    assert rate.headroom() == 0
+    time.sleep(0.06)
+    assert rate.headroom() == 2
+    assert rate.try_hit() == 0
+
+
+def test_request_heavier_than_the_limit_is_sent_on_an_empty_window():
+    rate = RateWindow(limit=1, window=0.05)
+    assert rate.try_hit(weight=2) == 0
+    assert rate.try_hit() > 0
+
+
+def test_acquire_waits_for_headroom(loop):
+    credential, = credentials(())
+    slot = KeySlot(credential, KeyClient(credential), RateWindow(limit=1, window=0.05))
+
+    async def twice():
+        await slot.acquire()
+        started = time.monotonic()
+        await slot.acquire()
+        return time.monotonic() - started
+
+    assert loop.run_until_complete(twice()) >= 0.04
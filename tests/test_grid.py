@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.grid import GridConfig, GridConfigException, GridConfigWatcher, GridManager
+
+
+def keys(rows):
+    return sorted(row.key for row in rows)
+
+
+def test_levels():
+    levels = GridConfig(36, 42, 3, 1.5).levels()
+    assert [(row.buy, row.sell, row.amount) for row in levels] == [(36, 38, 0.5), (38, 40, 0.5), (40, 42, 0.5)]
+
+
+def test_diff_keeps_overlapping_levels():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    diff = grid.diff(GridConfig(38, 44, 3, 1.5))
+    assert keys(diff.keep) == [(38, 40), (40, 42)]
+    assert keys(diff.cancel) == [(36, 38)]
+    assert keys(diff.add) == [(42, 44)]
+    assert diff.retire == []
+
+
+def test_apply_retires_holding_levels():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    holding = grid.bid_ping_table[0]
+    grid.bid_ping_table.remove(holding)
+    grid.ask_pong_table.append(holding)
+
+    diff = grid.shift(2)
+    assert diff.retire == [holding]
+    assert holding.retired
+    assert holding in grid.ask_pong_table
+    assert keys(grid.bid_ping_table) == [(38, 40), (40, 42), (42, 44)]
+
+
+def test_retired_level_rejoins_when_back_in_grid():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    holding = grid.bid_ping_table[0]
+    grid.bid_ping_table.remove(holding)
+    grid.ask_pong_table.append(holding)
+    grid.shift(2)
+    grid.shift(-2)
+    assert not holding.retired
+    assert keys(grid.bid_ping_table) == [(38, 40), (40, 42)]
+
+
+def test_recenter():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    assert grid.recenter(40) is None
+    grid.recenter(47)
+    assert (grid.config.first_price, grid.config.last_price) == (44, 50)
+    assert not grid.is_outside(47)
+
+
+def test_extend():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    diff = grid.extend(below=1, above=-1)
+    assert (grid.config.first_price, grid.config.last_price, grid.config.step_size) == (34, 40, 3)
+    assert keys(diff.add) == [(34, 36)]
+    assert keys(diff.cancel) == [(40, 42)]
+
+
+@pytest.mark.parametrize("config", [
+    GridConfig(36, 42, 0, 1),
+    GridConfig(36, 42, -2, 1),
+    GridConfig(42, 36, 3, 1),
+    GridConfig(36, 42, 3, 0),
+])
+def test_invalid_config_leaves_grid_unchanged(config):
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    before = list(grid.bid_ping_table)
+    with pytest.raises(GridConfigException):
+        grid.apply(config)
+    assert grid.bid_ping_table == before
+    assert grid.config == GridConfig(36, 42, 3, 1.5)
+
+
+def test_extend_below_zero_levels_is_rejected():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    with pytest.raises(GridConfigException):
+        grid.extend(below=-5)
+    assert len(grid.bid_ping_table) == 3
+
+
+def test_watcher_rejects_invalid_config(tmp_path):
+    path = tmp_path / "grid.json"
+    path.write_text(json.dumps({"FIRST_PRICE": 36, "LAST_PRICE": 42, "STEP_SIZE": 0, "TOTAL_AMOUNT": 1}))
+    assert GridConfigWatcher(str(path)).poll() is None
+
+
+def test_watcher_reloads_on_change(tmp_path):
+    path = tmp_path / "grid.json"
+    path.write_text(json.dumps({"FIRST_PRICE": 36, "LAST_PRICE": 42, "STEP_SIZE": 2, "TOTAL_AMOUNT": 1}))
+    watcher = GridConfigWatcher(str(path))
+    assert watcher.poll() == GridConfig(36, 42, 2, 1)
+    assert watcher.poll() is None
@@ -0,0 +1,110 @@
+import pytest
+
+from src.client import SIDE_BUY, SIDE_SELL
+from src.ledger import Ledger, Position
+
+
+def test_long_average_cost_and_realized():
+    position = Position()
+    position.apply(SIDE_BUY, 10, 1)
+    position.apply(SIDE_BUY, 12, 1)
+    assert position.average_price == pytest.approx(11)
+
+    position.apply(SIDE_SELL, 13, 1.5)
+    assert position.inventory == pytest.approx(0.5)
+    assert position.average_price == pytest.approx(11)
+    assert position.realized == pytest.approx(3)
+
+
+def test_short_realized_on_cover():
+    position = Position()
+    position.apply(SIDE_SELL, 20, 2)
+    assert position.inventory == pytest.approx(-2)
+    assert position.average_price == pytest.approx(20)
+
+    position.apply(SIDE_BUY, 18, 1)
+    assert position.inventory == pytest.approx(-1)
+    assert position.realized == pytest.approx(2)
+
+
+def test_flip_from_long_to_short():
+    position = Position()
+    position.apply(SIDE_BUY, 10, 1)
+    position.apply(SIDE_SELL, 12, 1.5)
+    assert position.realized == pytest.approx(2)
+    assert position.inventory == pytest.approx(-0.5)
+    assert position.average_price == pytest.approx(12)
+
+    position.apply(SIDE_BUY, 11, 1)
+    assert position.realized == pytest.approx(2.5)
+    assert position.inventory == pytest.approx(0.5)
+    assert position.average_price == pytest.approx(11)
+
+
+def test_flat_after_close():
+    position = Position()
+    position.apply(SIDE_BUY, 10, 0.1)
+    position.apply(SIDE_BUY, 10, 0.2)
+    position.apply(SIDE_SELL, 11, 0.3)
+    assert position.inventory == 0.0
+    assert position.cost == 0.0
+    assert position.realized == pytest.approx(0.3)
+
+
+def test_fees_reduce_equity():
+    position = Position()
+    position.apply(SIDE_BUY, 10, 1, fee=0.01)
+    position.mark(10)
+    assert position.equity == pytest.approx(-0.01)
+
+
+def test_unrealized_and_drawdown_follow_market_mark():
+    position = Position()
+    position.apply(SIDE_BUY, 10, 1)
+    position.mark(14)
+    assert position.unrealized == pytest.approx(4)
+    position.mark(12)
+    assert position.drawdown == pytest.approx(2)
+
+
+def test_fill_does_not_overwrite_market_mark():
+    position = Position()
+    position.apply(SIDE_BUY, 40, 1)
+    position.mark(43)
+    position.apply(SIDE_SELL, 42, 0.5)  # limit price under the market
+    assert position.last_price == 43
+    assert position.unrealized == pytest.approx(1.5)
+    assert position.drawdown == pytest.approx(0.5)  # only the sale under the mark, the rest stays at 43
+
+
+def test_replay(tmp_path):
+    ledger = Ledger(str(tmp_path))
+    ledger.record_fill("NEOUSDT", SIDE_BUY, 10, 1, 0.01)
+    ledger.record_fill("NEOUSDT", SIDE_BUY, 12, 1, 0.012)
+    ledger.record_fill("NEOUSDT", SIDE_SELL, 13, 1.5, 0.0195)
+    ledger.record_fill("BTCUSDT", SIDE_BUY, 100, 0.1)
+    live = ledger.position("NEOUSDT")
+    ledger.close()
+
+    replayed = Ledger(str(tmp_path)).position("NEOUSDT")
+    assert replayed.inventory == pytest.approx(live.inventory)
+    assert replayed.cost == pytest.approx(live.cost)
+    assert replayed.realized == pytest.approx(live.realized)
+    assert replayed.fees == pytest.approx(live.fees)
+
+
+def test_replay_ignores_truncated_record(tmp_path):
+    ledger = Ledger(str(tmp_path))
+    ledger.record_fill("NEOUSDT", SIDE_BUY, 10, 1)
+    ledger.close()
+    with open(tmp_path / "NEOUSDT.fills.bin", "ab") as f:
+        f.write(b"\x00" * 5)
+    assert Ledger(str(tmp_path)).position("NEOUSDT").inventory == pytest.approx(1)
+
+
+def test_memory_only_ledger_writes_nothing(tmp_path):
+    ledger = Ledger()
+    ledger.record_fill("NEOUSDT", SIDE_BUY, 10, 1)
+    assert ledger.position("NEOUSDT").inventory == 1
+    assert ledger.drawdown("NEOUSDT") == pytest.approx(0)
+    assert ledger.drawdown("BTCUSDT") is None
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.binance.rest import BinanceClient
+from src.client import SIDE_BUY, SIDE_SELL, Ticker
+from src.ledger import Ledger
+from src.liquidation import EmergencyLiquidator, StopLossGuard
+
+SYMBOL = "NEOUSDT"
+
+
+def breach(price=34.0):
+    return Ticker(bid=price, ask=price, last=price)
+
+
+class FailingCancelClient(BinanceClient):
+    """
+    Bulk cancel fails the first `failures` times, like a timeout or a rate limit
+    """
+
+    def __init__(self, *args, failures=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = failures
+        self.cancels = 0
+
+    async def cancel_all(self, symbol):
+        self.cancels += 1
+        if self.cancels <= self.failures:
+            return None
+        return await super().cancel_all(symbol)
+
+
+def rest_sells(loop, client, count=4):
+    async def sells():
+        await asyncio.gather(*[client.sell_order_limit(SYMBOL, 41.0 + i, 1.0 / count) for i in range(count)])
+
+    loop.run_until_complete(sells())
+
+
+def test_liquidate_cancels_resting_orders_and_sells_everything(loop, exchange, client):
+    rest_sells(loop, client)
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO")
+    assert loop.run_until_complete(liquidator.liquidate()) is not None
+    assert exchange.open_orders == {}
+    assert exchange.free["NEO"] == pytest.approx(0)
+    assert exchange.free["USDT"] == pytest.approx(140)
+    assert liquidator.latency is not None
+
+
+def test_liquidate_runs_once(loop, exchange, client):
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO")
+
+    async def twice():
+        return await asyncio.gather(liquidator.liquidate(), liquidator.liquidate())
+
+    first, second = loop.run_until_complete(twice())
+    assert second is None  # the second caller does not own the liquidation, nothing finished yet
+    assert len(exchange.fills) == 1
+
+
+def test_liquidation_sell_is_booked_in_the_ledger(loop, exchange, client):
+    ledger = Ledger()
+    ledger.record_fill(SYMBOL, SIDE_BUY, 45.0, 1.0)
+    rest_sells(loop, client)
+    liquidator = EmergencyLiquidator(
+        client, SYMBOL, "NEO",
+        on_fill=lambda fill: ledger.record_fill(SYMBOL, SIDE_SELL, fill.price, fill.qty)
+    )
+    loop.run_until_complete(liquidator.liquidate())
+    position = ledger.position(SYMBOL)
+    assert position.inventory == pytest.approx(0)
+    assert position.realized == pytest.approx(-5.0)
+
+
+def test_nothing_to_sell_books_nothing(loop, exchange, client):
+    exchange.free["NEO"] = 0.0
+    fills = []
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO", on_fill=fills.append)
+    loop.run_until_complete(liquidator.liquidate())
+    assert fills == []
+
+
+def test_nothing_open_still_sells(loop, exchange, client):
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO")
+    loop.run_until_complete(liquidator.liquidate())
+    assert exchange.free["NEO"] == pytest.approx(0)
+
+
+def test_failed_bulk_cancel_is_retried(loop, exchange):
+    client = FailingCancelClient("key", "secret", host=exchange.host, failures=2)
+    rest_sells(loop, client)
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO", retry_delay=0)
+    loop.run_until_complete(liquidator.liquidate())
+    assert client.cancels == 3
+    assert exchange.free["NEO"] == pytest.approx(0)
+
+
+def test_cancel_retries_give_up_and_sell_the_free_part(loop, exchange):
+    client = FailingCancelClient("key", "secret", host=exchange.host, failures=10)
+    loop.run_until_complete(client.sell_order_limit(SYMBOL, 41.0, 0.4))
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO", cancel_retries=2, retry_delay=0)
+    loop.run_until_complete(liquidator.liquidate())
+    assert client.cancels == 3
+    assert exchange.free["NEO"] == pytest.approx(0)
+    assert exchange.locked["NEO"] == pytest.approx(0.4)
+
+
+def test_amount_rounded_down_to_lot_step(loop, exchange, client):
+    exchange.free["NEO"] = 0.123456
+    liquidator = EmergencyLiquidator(client, SYMBOL, "NEO", step_size=0.001)
+    loop.run_until_complete(liquidator.liquidate())
+    assert exchange.fills[-1]["quantity"] == pytest.approx(0.123)
+
+
+def test_guard_liquidates_on_pushed_breach(loop, exchange, client):
+    flat = []
+    guard = StopLossGuard(EmergencyLiquidator(client, SYMBOL, "NEO"), stop_price=35.0, on_flat=flat.append)
+
+    async def scenario():
+        watcher = asyncio.ensure_future(guard.watch())
+        await asyncio.sleep(0)
+        guard.on_ticker(SYMBOL, breach(36.0))
+        guard.on_ticker("BTCUSDT", breach())
+        assert not guard.liquidator.triggered
+        guard.on_ticker(SYMBOL, breach())
+        guard.on_ticker(SYMBOL, breach())
+        assert guard.liquidator.triggered  # armed on the feed thread, before the sell
+        await asyncio.wait_for(watcher, 5)
+
+    loop.run_until_complete(scenario())
+    assert flat == [guard.liquidator]
+    assert len(exchange.fills) == 1
+    assert guard.stopped.is_set()
+
+
+def test_guard_ignores_prices_before_it_runs(loop, exchange, client):
+    guard = StopLossGuard(EmergencyLiquidator(client, SYMBOL, "NEO"), stop_price=35.0)
+    guard.on_ticker(SYMBOL, breach())
+    assert not guard.liquidator.triggered
+
+
+def test_in_tick_trigger_and_pushed_breach_flatten_once(loop, exchange, client):
+    flat = []
+    guard = StopLossGuard(EmergencyLiquidator(client, SYMBOL, "NEO"), stop_price=35.0, on_flat=flat.append)
+
+    async def scenario():
+        watcher = asyncio.ensure_future(guard.watch())
+        await asyncio.sleep(0)
+        assert await guard.check(34.0)
+        guard.on_ticker(SYMBOL, breach())
+        await asyncio.wait_for(watcher, 5)
+
+    loop.run_until_complete(scenario())
+    assert len(flat) == 1
+    assert len(exchange.fills) == 1
+
+
+def test_guard_thread_stops_without_liquidating(client):
+    guard = StopLossGuard(EmergencyLiquidator(client, SYMBOL, "NEO"), stop_price=35.0)
+    guard.start()
+    while guard.loop is None and guard.thread.is_alive():
+        threading.Event().wait(0.001)
+    guard.stop()
+    guard.thread.join(5)
+    assert not guard.thread.is_alive()
+    assert not guard.liquidator.triggered
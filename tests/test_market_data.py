@@ -0,0 +1,107 @@
+import asyncio
+
+from src.client import Ticker
+from src.market_data import MarketDataHub
+
+
+class GatedClient:
+    """
+    get_tickers waits for the test to open the gate, then answers for the symbols it was given,
+    like the bulk endpoints decoding against the live symbol set
+    """
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.fail = False
+
+    async def get_tickers(self, symbols):
+        self.calls += 1
+        await self.gate.wait()
+        if self.fail:
+            return None
+        return {symbol: Ticker(price, price, price) for symbol, price in self.prices.items() if symbol in symbols}
+
+
+def test_concurrent_callers_share_one_request(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0})
+        hub = MarketDataHub(client, interval=60)
+        callers = [asyncio.ensure_future(hub.get_ticker("NEOUSDT")) for _ in range(10)]
+        await asyncio.sleep(0)
+        client.gate.set()
+        tickers = await asyncio.gather(*callers)
+        return client.calls, tickers
+
+    calls, tickers = loop.run_until_complete(scenario())
+    assert calls == 1
+    assert {ticker.last for ticker in tickers} == {40.0}
+
+
+def test_fresh_ticker_is_served_without_request(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0})
+        client.gate.set()
+        hub = MarketDataHub(client, interval=60)
+        await hub.get_ticker("NEOUSDT")
+        await hub.get_ticker("NEOUSDT")
+        return client.calls
+
+    assert loop.run_until_complete(scenario()) == 1
+
+
+def test_symbol_subscribed_during_request_is_decoded_from_it(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0, "BTCUSDT": 60000.0})
+        hub = MarketDataHub(client, interval=60)
+        first = asyncio.ensure_future(hub.get_ticker("NEOUSDT"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(hub.get_ticker("BTCUSDT"))
+        await asyncio.sleep(0)
+        client.gate.set()
+        return client.calls, await first, await second
+
+    calls, neo, btc = loop.run_until_complete(scenario())
+    assert calls == 1
+    assert (neo.last, btc.last) == (40.0, 60000.0)
+
+
+def test_failed_request_returns_none(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0})
+        client.fail = True
+        client.gate.set()
+        hub = MarketDataHub(client, interval=60)
+        return await hub.get_ticker("NEOUSDT")
+
+    assert loop.run_until_complete(scenario()) is None
+
+
+def test_stale_ticker_is_not_served_after_failed_refresh(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0})
+        client.gate.set()
+        hub = MarketDataHub(client, interval=0.01)
+        fresh = await hub.get_ticker("NEOUSDT")
+        await asyncio.sleep(0.02)
+        client.fail = True
+        return fresh, await hub.get_ticker("NEOUSDT")
+
+    fresh, stale = loop.run_until_complete(scenario())
+    assert fresh.last == 40.0
+    assert stale is None
+
+
+def test_listeners_get_every_ticker(loop):
+    async def scenario():
+        client = GatedClient({"NEOUSDT": 40.0, "BTCUSDT": 60000.0})
+        client.gate.set()
+        hub = MarketDataHub(client, interval=60)
+        seen = []
+        hub.add_listener(lambda symbol, ticker: seen.append((symbol, ticker.last)))
+        hub.subscribe("BTCUSDT")
+        await hub.get_ticker("NEOUSDT")
+        return seen
+
+    assert sorted(loop.run_until_complete(scenario())) == [("BTCUSDT", 60000.0), ("NEOUSDT", 40.0)]
@@ -0,0 +1,126 @@
+import pytest
+
+from src.binance.rest import BinanceClient
+from src.grid import GridConfig, GridManager, LocalOrder
+from src.orders import CoalescedOrder, coalesce_buy_rows, settle
+
+SYMBOL = "NEOUSDT"
+
+
+def levels(*amounts):
+    return [LocalOrder(buy=40 - i, sell=42 - i, amount=amount) for i, amount in enumerate(amounts)]
+
+
+def test_split_covers_whole_levels_and_carries_the_rest():
+    first, second = levels(0.5, 0.5)
+    order = CoalescedOrder([first, second], 39)
+    assert order.split(0.7) == [first]
+    assert second.filled == pytest.approx(0.2)
+    assert CoalescedOrder([second], 39).amount == pytest.approx(0.3)
+
+
+def test_fill_smaller_than_one_level_is_carried():
+    row, = levels(0.5)
+    assert CoalescedOrder([row], 40).split(0.3) == []
+    assert row.remaining == pytest.approx(0.2)
+
+    assert CoalescedOrder([row], 40).split(0.2) == [row]
+    assert row.filled == 0.0
+    assert row.remaining == 0.5
+
+
+def test_split_whole_order():
+    rows = levels(0.5, 0.25)
+    assert CoalescedOrder(rows, 39).split() == rows
+
+
+def test_coalesced_amount_excludes_carried_fills():
+    rows = levels(0.5, 0.5)
+    rows[0].filled = 0.1
+    order, = coalesce_buy_rows(rows)
+    assert order.amount == pytest.approx(0.9)
+    assert order.rows[0] is rows[0]
+
+
+def test_partly_bought_level_leaving_the_grid_sells_its_part():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    partial = grid.bid_ping_table[0]
+    partial.filled = 0.2
+    diff = grid.shift(2)
+    assert diff.retire == [partial]
+    assert partial in grid.ask_pong_table and partial not in grid.bid_ping_table
+    assert (partial.amount, partial.filled, partial.retired) == (0.2, 0.0, True)
+
+
+def test_shrunk_level_already_bought_moves_to_the_ask_table():
+    grid = GridManager(GridConfig(36, 42, 3, 1.5))
+    partial = grid.bid_ping_table[0]
+    partial.filled = 0.4
+    grid.resize(GridConfig(36, 42, 3, 0.9))
+    assert partial in grid.ask_pong_table
+    assert partial.amount == pytest.approx(0.4)
+
+
+class UnreachableCancelClient(BinanceClient):
+    """
+    Every cancel fails like a timeout, the order stays open on the exchange
+    """
+
+    async def cancel_order(self, symbol, order_id):
+        return None
+
+
+class UnreachableClient(UnreachableCancelClient):
+    async def get_order(self, symbol, order_id):
+        return None
+
+
+def place_buy(loop, client, rows, price):
+    order = CoalescedOrder(rows, price)
+    response = loop.run_until_complete(client.buy_order_limit(SYMBOL, price, order.amount))
+    return order, response
+
+
+def test_settle_marketable_order_fills_without_cancel(loop, exchange, client):
+    order, response = place_buy(loop, client, levels(0.5, 0.5), 41.0)
+    fill = loop.run_until_complete(settle(client, SYMBOL, order, response))
+    assert fill.qty == pytest.approx(1.0)
+    assert fill.price == pytest.approx(40.0)
+
+
+def test_settle_cancels_the_unfilled_remainder(loop, exchange, client):
+    order, response = place_buy(loop, client, levels(0.5, 0.5), 39.0)
+    exchange.execute(client.order_id_of(response), 0.7)
+    fill = loop.run_until_complete(settle(client, SYMBOL, order, response))
+    assert fill.qty == pytest.approx(0.7)
+    assert fill.price == pytest.approx(39.0)
+    assert exchange.open_orders == {}
+    assert exchange.locked["USDT"] == pytest.approx(0)
+    assert exchange.free["USDT"] == pytest.approx(100 - 0.7 * 39)
+
+
+def test_settle_reads_the_status_of_an_order_filled_before_the_cancel(loop, exchange, client):
+    order, response = place_buy(loop, client, levels(0.5), 39.0)
+    exchange.execute(client.order_id_of(response), 0.5)
+    fill = loop.run_until_complete(settle(client, SYMBOL, order, response))
+    assert fill.qty == pytest.approx(0.5)
+
+
+def test_failed_cancel_books_only_what_executed(loop, exchange):
+    client = UnreachableCancelClient("key", "secret", host=exchange.host)
+    order, response = place_buy(loop, client, levels(0.5, 0.5), 39.0)
+    exchange.execute(client.order_id_of(response), 0.3)
+    fill = loop.run_until_complete(settle(client, SYMBOL, order, response))
+    assert fill.qty == pytest.approx(0.3)
+
+
+def test_unknown_status_books_the_response_fill(loop, exchange):
+    client = UnreachableClient("key", "secret", host=exchange.host)
+    order, response = place_buy(loop, client, levels(0.5), 39.0)
+    exchange.execute(client.order_id_of(response), 0.5)
+    assert loop.run_until_complete(settle(client, SYMBOL, order, response)).qty == 0.0
+
+
+def test_rejected_order_fills_nothing(loop, client):
+    order = CoalescedOrder(levels(0.5), 39.0)
+    assert loop.run_until_complete(settle(client, SYMBOL, order, None)).qty == 0.0
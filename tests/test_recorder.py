@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.client import SIDE_BUY, SIDE_NONE, SIDE_SELL, Ticker
+from src.recorder import DEPTH, ORDER, TICKER, TRADE, TickReader, TickRecorder, column_path
+
+
+def test_round_trip(tmp_path):
+    recorder = TickRecorder(str(tmp_path), batch_size=2)
+    recorder.record_ticker("NEOUSDT", Ticker(39.9, 40.1, 40.0))
+    recorder.record_ticker("NEOUSDT", Ticker(40.9, 41.1, 41.0))
+    recorder.record_ticker("NEOUSDT", Ticker(41.9, 42.1, 42.0))
+    recorder.record_order("NEOUSDT", 36.0, 0.5, SIDE_BUY)
+    recorder.record_trade("NEOUSDT", 40.5, 0.25, SIDE_SELL, timestamp=123)
+    recorder.close()
+
+    reader = TickReader(str(tmp_path))
+    assert reader.symbols() == ["NEOUSDT"]
+    tickers = reader.read("NEOUSDT", TICKER)
+    assert isinstance(tickers.price, np.memmap)
+    assert tickers.price.shape == (3,)
+    assert tickers.price.tolist() == [40.0, 41.0, 42.0]
+    assert tickers.side.tolist() == [SIDE_NONE] * 3
+    assert (np.diff(tickers.timestamp) >= 0).all()
+
+    orders = reader.read("NEOUSDT", ORDER)
+    assert (orders.price.tolist(), orders.qty.tolist(), orders.side.tolist()) == ([36.0], [0.5], [SIDE_BUY])
+    trades = reader.read("NEOUSDT", TRADE)
+    assert (trades.timestamp.tolist(), trades.side.tolist()) == ([123], [SIDE_SELL])
+
+
+def test_depth_levels_share_the_snapshot_timestamp(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    recorder.record_depth("NEOUSDT", [["39.9", "1.5", []], ["39.8", "2.0", []]], [["40.1", "0.5", []]])
+    recorder.close()
+    depth = TickReader(str(tmp_path)).read("NEOUSDT", DEPTH)
+    assert depth.price.tolist() == [39.9, 39.8, 40.1]
+    assert depth.qty.tolist() == [1.5, 2.0, 0.5]
+    assert depth.side.tolist() == [SIDE_BUY, SIDE_BUY, SIDE_SELL]
+    assert len(set(depth.timestamp.tolist())) == 1
+
+
+def test_truncated_last_column_is_cut_to_complete_rows(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    for price in (40.0, 41.0, 42.0):
+        recorder.record_ticker("NEOUSDT", Ticker(price, price, price))
+    recorder.close()
+    # crash in the middle of a flush: the last column lost its last row, the price column a few bytes
+    side = column_path(str(tmp_path), "NEOUSDT", TICKER, "side")
+    with open(side, "rb+") as f:
+        f.truncate(os.path.getsize(side) - 1)
+    price = column_path(str(tmp_path), "NEOUSDT", TICKER, "price")
+    with open(price, "ab") as f:
+        f.write(b"\x00" * 3)
+
+    tickers = TickReader(str(tmp_path)).read("NEOUSDT", TICKER)
+    assert [len(column) for column in tickers] == [2, 2, 2, 2]
+    assert tickers.price.tolist() == [40.0, 41.0]
+
+
+def test_empty_stream(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    recorder.stream("NEOUSDT", TRADE)
+    recorder.close()
+    trades = TickReader(str(tmp_path)).read("NEOUSDT", TRADE)
+    assert [column.dtype for column in trades] == [np.int64, np.float64, np.float64, np.int8]
+    assert all(len(column) == 0 for column in trades)
+
+
+def test_exchange_depth_is_recorded(loop, client, tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    depth = loop.run_until_complete(client.order_book("NEOUSDT"))
+    recorder.record_depth("NEOUSDT", depth["bids"], depth["asks"])
+    recorder.close()
+    recorded = TickReader(str(tmp_path)).read("NEOUSDT", DEPTH)
+    assert recorded.price[:5].tolist() == pytest.approx([39.99, 39.98, 39.97, 39.96, 39.95])
+    assert recorded.side.tolist() == [SIDE_BUY] * 5 + [SIDE_SELL] * 5
@@ -0,0 +1,82 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from src.sync_bridge import LoopThread, SyncClient
+
+
+@pytest.fixture
+def bridge():
+    bridge = LoopThread("test-loop")
+    yield bridge
+    bridge.stop()
+
+
+async def echo(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value, threading.current_thread().name
+
+
+def test_run_sync_returns_result_from_the_loop_thread(bridge):
+    assert bridge.run_sync(echo(1)) == (1, "test-loop")
+
+
+def test_concurrent_calls_from_several_threads(bridge):
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: bridge.run_sync(echo(i, 0.01)), range(32)))
+    assert results == [(i, "test-loop") for i in range(32)]
+
+
+def test_timeout_cancels_the_coroutine(bridge):
+    canceled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            canceled.set()
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        bridge.run_sync(slow(), timeout=0.05)
+    assert canceled.wait(1)
+
+
+def test_run_sync_from_the_loop_thread_raises(bridge):
+    async def nested():
+        with pytest.raises(RuntimeError):
+            bridge.run_sync(echo(1))
+        return True
+
+    assert bridge.run_sync(nested())
+
+
+def test_run_sync_inside_another_running_loop(loop, bridge):
+    async def caller():
+        return bridge.run_sync(echo(2))
+
+    assert loop.run_until_complete(caller()) == (2, "test-loop")
+
+
+def test_stop_and_restart(bridge):
+    bridge.run_sync(echo(1))
+    bridge.stop()
+    assert bridge.thread is None
+    assert bridge.run_sync(echo(2)) == (2, "test-loop")
+
+
+class Client:
+    async def get_ticker(self, symbol):
+        return symbol
+
+    def order_id_of(self, response):
+        return response
+
+
+def test_sync_client_blocks_on_coroutines_only(bridge):
+    client = SyncClient(Client(), bridge, timeout=1)
+    assert client.get_ticker("NEOUSDT") == "NEOUSDT"
+    assert client.order_id_of(5) == 5
+    assert client.submit("get_ticker", "NEOUSDT").result(1) == "NEOUSDT"
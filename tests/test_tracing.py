@@ -0,0 +1,34 @@
+import json
+
+from src.tracing import Tracer
+
+
+def test_last_tick_and_its_children(tmp_path):
+    tracer = Tracer()
+    for tick in range(3):
+        with tracer.span("tick", symbol="NEOUSDT", tick=tick):
+            with tracer.span("ticker"):
+                pass
+            with tracer.span("api/v3/order", "request", asynchronous=True):
+                pass
+    with tracer.span("ticker"):  # outside any tick
+        pass
+
+    spans = tracer.last("tick")
+    assert sorted(span.name for span in spans) == ["api/v3/order", "tick", "ticker"]
+    assert [span.args for span in spans if span.name == "tick"] == [{"symbol": "NEOUSDT", "tick": 2}]
+
+    path = tracer.export_chrome_trace(str(tmp_path / "trace.json"), last="tick")
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert sorted(event["ph"] for event in events) == ["X", "X", "b", "e"]
+
+
+def test_whole_buffer_by_default(tmp_path):
+    tracer = Tracer()
+    for _ in range(3):
+        with tracer.span("tick"):
+            pass
+    assert tracer.last("missing") == []
+    with open(tracer.export_chrome_trace(str(tmp_path / "trace.json"))) as f:
+        assert len(json.load(f)["traceEvents"]) == 3